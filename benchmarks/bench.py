@@ -0,0 +1,252 @@
+"""
+Reproducible benchmark suite for q1 and q2 with regression tracking.
+
+- run: time every stage over a sweep of synthetic input sizes and write the results as JSON
+- compare: flag benchmarks whose median time or peak memory regressed against a stored baseline
+
+Run from the repository root:
+
+    python -m benchmarks.bench run --output results.json
+    python -m benchmarks.bench compare baseline.json results.json
+
+Inputs are generated synthetically from a fixed seed. Every stage gets warm-up runs, then timed repetitions, then one
+extra run under tracemalloc for its peak memory, so the memory measurement never slows the timed runs. Parse stages
+empty the date cache in their untimed setup, so repetitions of the same file measure a cold parse.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+from collections import defaultdict
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from q1.instrumentation import collect
+from q1.utils import clear_date_cache, parse_data
+from q1.twr import calculate_total_time_weighted_return
+from q2.filter_plan import filter_plan, filter_plan_fast
+
+Q1_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+Q2_SIZES = [1_000, 10_000, 100_000, 500_000, 5_000_000]
+SEED = 42
+
+# SYNTHETIC DATA
+
+def synthetic_valuations(size: int, seed: int = SEED) -> pd.DataFrame:
+    """Random valuation history in the CSV layout, as random_valuation_df in q1/tests/test_perf.py builds it."""
+    rng = np.random.default_rng(seed)
+    # spread the dates over a century, repeating dates once there are more rows than days
+    dates = pd.Timestamp("1900-01-01") + pd.to_timedelta(np.arange(size, dtype=np.int64) * 36_500 // max(size, 36_500), unit="D")
+    return pd.DataFrame({
+        "valuation_date": dates.strftime("%d/%m/%Y"),
+        "total_valuation": np.round(1000 + np.cumsum(rng.random(size)), 2),
+        "cash_flow": rng.choice([0.0, 50.0, -50.0], size=size, p=[0.8, 0.1, 0.1]),
+    })
+
+def synthetic_plan(size: int, seed: int = SEED, unknown_fraction: float = 0.5) -> str:
+    """
+    Random street plan that filter_plan can solve: random letters with a fraction of positions replaced by '?'.
+
+    The greedy filter_plan can dead-end when a '?' sits before two equal fixed letters (e.g. "?a?bb"), so the second
+    letter of any fixed equal pair is also replaced by '?'. With no fixed equal pairs a candidate always survives.
+    """
+    rng = np.random.default_rng(seed)
+    letters = np.where(rng.random(size) < 0.5, ord("a"), ord("b")).astype(np.uint8)
+    unknown = rng.random(size) < unknown_fraction
+    fixed_pairs = ~unknown[:-1] & ~unknown[1:] & (letters[:-1] == letters[1:])
+    unknown[1:] |= fixed_pairs
+    letters[unknown] = ord("?")
+    return letters.tobytes().decode("ascii")
+
+# MEASUREMENT
+
+def measure(stage, setup, repeat: int, warmup: int) -> dict:
+    """Time stage(setup()) with warm-up runs and repetitions, then measure its peak memory in one extra traced run."""
+    for _ in range(warmup):
+        stage(setup())
+
+    times = []
+    for _ in range(repeat):
+        arg = setup() # setup is never timed
+        start = time.perf_counter()
+        stage(arg)
+        times.append(time.perf_counter() - start)
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        stage(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return _summary(times, peak)
+
+def _summary(times: list[float], peak) -> dict:
+    return {"times": times, "median": statistics.median(times), "min": min(times), "peak_memory_bytes": peak}
+
+def measure_stages(run, setup, repeat: int, warmup: int) -> dict[str, dict]:
+    """
+    Time run(setup()) like measure, but report each instrumented pipeline stage inside it (read_csv, validate, sort)
+    separately, from q1.instrumentation records. Returns a measure-style result per stage name.
+    """
+    for _ in range(warmup):
+        run(setup())
+
+    times = defaultdict(list)
+    for _ in range(repeat):
+        arg = setup()
+        with collect() as records:
+            run(arg)
+        for record in records:
+            times[record.stage].append(record.seconds)
+
+    arg = setup()
+    with collect(track_memory=True) as records:
+        run(arg)
+    peaks = {record.stage: record.peak_memory_bytes for record in records}
+    # a stage that only runs on some calls (e.g. after a fallback) may be missing from the traced run; it has no peak
+    # to report, so it is left out rather than written with a peak that compare would fail on
+    return {name: _summary(stage_times, peaks[name]) for name, stage_times in times.items() if name in peaks}
+
+def run_q1(size: int, repeat: int, warmup: int, tmp_dir: str) -> list[dict]:
+    csv_path = os.path.join(tmp_dir, f"valuations_{size}.csv")
+    out_path = os.path.join(tmp_dir, f"twr_{size}.csv")
+    synthetic_valuations(size).to_csv(csv_path, index=False)
+    parsed = parse_data(csv_path)
+    twr_series = calculate_total_time_weighted_return(parsed)
+
+    def cold_csv_path() -> str:
+        """Empty the parse_dates cache so every timed parse pays for its dates, as a first run over a new file does."""
+        clear_date_cache()
+        return csv_path
+
+    results = []
+    # the real parse_data, in full and broken down into its instrumented stages
+    for prefix, fast in (("q1.parse", False), ("q1.fast_parse", True)):
+        run = lambda path: parse_data(path, fast=fast)
+        results.append({"benchmark": prefix, "size": size, **measure(run, cold_csv_path, repeat, warmup)})
+        for name, result in measure_stages(run, cold_csv_path, repeat, warmup).items():
+            results.append({"benchmark": f"{prefix}.{name}", "size": size, **result})
+
+    stages = {
+        "q1.compute": (calculate_total_time_weighted_return, lambda: parsed),
+        "q1.output": (lambda series: series.to_csv(out_path), lambda: twr_series),
+    }
+    return results + [{"benchmark": name, "size": size, **measure(stage, setup, repeat, warmup)}
+                      for name, (stage, setup) in stages.items()]
+
+def run_q2(size: int, repeat: int, warmup: int) -> list[dict]:
+    plan = synthetic_plan(size)
+    stages = {"q2.filter_plan": filter_plan, "q2.filter_plan_fast": filter_plan_fast}
+    return [{"benchmark": name, "size": size, **measure(stage, lambda: plan, repeat, warmup)}
+            for name, stage in stages.items()]
+
+def run(args) -> int:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in args.q1_sizes:
+            print(f"q1: {size:,} rows", file=sys.stderr)
+            results.extend(run_q1(size, args.repeat, args.warmup, tmp_dir))
+        for size in args.q2_sizes:
+            print(f"q2: {size:,} characters", file=sys.stderr)
+            results.extend(run_q2(size, args.repeat, args.warmup))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "seed": SEED,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for result in results:
+        print(f"{result['benchmark']:<26} {result['size']:>12,}  median {result['median']:.6f}s  "
+              f"peak {result['peak_memory_bytes'] / 1e6:.1f}MB")
+    return 0
+
+# REGRESSION TRACKING
+
+def _ratio(current: dict, base: dict, metric: str) -> Optional[float]:
+    """current[metric] / base[metric], 1.0 for a zero baseline, or None if either report lacks the metric."""
+    if current.get(metric) is None or base.get(metric) is None:
+        return None
+    return current[metric] / base[metric] if base[metric] > 0 else 1.0
+
+def compare_reports(baseline: dict, current: dict, threshold: float, memory_threshold: float) -> list[str]:
+    """
+    Return a description of every benchmark whose median time or peak memory grew by more than the threshold.
+    Benchmarks missing from the baseline, and metrics missing from either report, are skipped.
+    """
+    baseline_results = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = (result["benchmark"], result["size"])
+        if key not in baseline_results:
+            continue
+        base = baseline_results[key]
+        time_ratio = _ratio(result, base, "median")
+        memory_ratio = _ratio(result, base, "peak_memory_bytes")
+        if time_ratio is not None and time_ratio > 1 + threshold:
+            regressions.append(f"{key[0]} size={key[1]:,}: median time {time_ratio:.2f}x baseline")
+        if memory_ratio is not None and memory_ratio > 1 + memory_threshold:
+            regressions.append(f"{key[0]} size={key[1]:,}: peak memory {memory_ratio:.2f}x baseline")
+    return regressions
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare_reports(baseline, current, args.threshold, args.memory_threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print("No regressions against baseline")
+    return 1 if regressions else 0
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="Benchmark q1 and q2 over a sweep of input sizes and track regressions."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmark sweep and write JSON results")
+    run_parser.add_argument("--output", default="bench_results.json", help="Path of the JSON results file")
+    run_parser.add_argument("--q1-sizes", type=int, nargs="*", default=Q1_SIZES, help="Row counts for q1 (default: 1e3 to 1e7)")
+    run_parser.add_argument("--q2-sizes", type=int, nargs="*", default=Q2_SIZES, help="Character counts for q2 (default: 1e3 to 5e6)")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per stage (default: 5)")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Untimed warm-up runs per stage (default: 1)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare results against a stored baseline")
+    compare_parser.add_argument("baseline", help="Baseline JSON results")
+    compare_parser.add_argument("current", help="Current JSON results")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed median time growth (default: 0.10)")
+    compare_parser.add_argument("--memory-threshold", type=float, default=0.10, help="Allowed peak memory growth (default: 0.10)")
+    compare_parser.set_defaults(func=compare)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sys.exit(args.func(args))
+
+if __name__ == "__main__":
+    main()
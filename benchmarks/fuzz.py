@@ -0,0 +1,176 @@
+"""
+Differential fuzz harness for the q2 solvers.
+
+- random_feasible_plans: generate many random plans that are known to have a solution, as one uint8 array
+- fuzz: run every solver side by side on random plans, cross-check them and measure their throughput
+
+Run from the repository root:
+
+    python -m benchmarks.fuzz --cases 2000 --lengths 4 8 12 100 10000
+
+Every output is checked with q2.verify. The greedy solvers (filter_plan and its fast, streaming and batch forms)
+must return exactly filter_plan's answer, or all fail where the greedy dead-ends. min_cost_plan must solve every
+plan, and must match filter_plan wherever filter_plan succeeds. Up to ORACLE_MAX_LENGTH characters, min_cost_plan
+must also return the first of q2.verify's brute-force solutions, and count_plans must match the number of brute-force solutions.
+"""
+
+import argparse
+import io
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+from q2.batch import solve_batch
+from q2.filter_plan import filter_plan, filter_plan_fast, stream_filter_plan
+from q2.optimal import count_plans, min_cost_plan
+from q2.verify import brute_force_solutions, find_violation
+
+ORACLE_MAX_LENGTH = 12
+SEED = 42
+
+# GENERATION
+
+def random_feasible_plans(count: int, length: int, unknown_fraction: float = 0.5, seed: int = SEED) -> np.ndarray:
+    """
+    Returns a (count, length) uint8 array of plans, one per row, each with at least one solution.
+
+    Each row starts as a random valid solution. Each letter repeats the previous one ("stays") at random, but never
+    twice in a row, so there are never three equal letters. Then a random fraction of positions is replaced by "?".
+    The original letters remain a solution.
+    """
+    rng = np.random.default_rng(seed)
+    coin = rng.random((count, length)) < 0.5
+    stay = coin.copy()
+    stay[:, 1:] &= ~coin[:, :-1] # no two stays in a row
+    stay[:, 0] = False
+    first = rng.random((count, 1)) < 0.5
+    letters = (first ^ (np.cumsum(~stay, axis=1) % 2).astype(bool)).astype(np.uint8) + ord("a")
+    letters[rng.random((count, length)) < unknown_fraction] = ord("?")
+    return letters
+
+# SOLVERS
+
+def _stream(plan: str) -> str:
+    sink = io.BytesIO()
+    stream_filter_plan(io.BytesIO(plan.encode("ascii")), sink, chunk_size=64) # small chunks, so long plans cross many boundaries
+    return sink.getvalue().decode("ascii")
+
+GREEDY_SOLVERS: dict[str, Callable[[str], str]] = {
+    "filter_plan": filter_plan,
+    "filter_plan_fast": filter_plan_fast,
+    "stream_filter_plan": _stream,
+}
+
+def _solve_all(solver: Callable[[str], str], plans: list[str]) -> tuple[list, float]:
+    """Run solver on every plan, returning (results, seconds). A result is the solution, or None if solver raised."""
+    results = []
+    start = time.perf_counter()
+    for plan in plans:
+        try:
+            results.append(solver(plan))
+        except (IndexError, ValueError):
+            results.append(None)
+    return results, time.perf_counter() - start
+
+def _solve_batch(plans: list[str]) -> tuple[list, float]:
+    start = time.perf_counter()
+    results = solve_batch([plan.encode("ascii") for plan in plans])
+    seconds = time.perf_counter() - start
+    return [solution.decode("ascii") if solution is not None else None for solution, _ in results], seconds
+
+# FUZZING
+
+def fuzz(cases: int, lengths: list[int], unknown_fraction: float = 0.5, seed: int = SEED) -> dict:
+    """
+    Cross-check every solver on cases random feasible plans of each length.
+
+    Returns:
+        - {"mismatches": [str, ...], "throughput": {solver: {"plans", "solved", "characters", "seconds"}}}. The greedy
+          solvers stop early on plans where they dead-end, so their throughput is only comparable at equal "solved".
+    """
+    mismatches = []
+    throughput = {}
+
+    def record(name: str, plans: list[str], results: list, seconds: float):
+        totals = throughput.setdefault(name, {"plans": 0, "solved": 0, "characters": 0, "seconds": 0.0})
+        totals["plans"] += len(plans)
+        totals["solved"] += sum(result is not None for result in results)
+        totals["characters"] += sum(map(len, plans))
+        totals["seconds"] += seconds
+
+    for length in lengths:
+        rows = random_feasible_plans(cases, length, unknown_fraction, seed + length)
+        plans = [row.tobytes().decode("ascii") for row in rows]
+
+        outputs = {}
+        for name, solver in GREEDY_SOLVERS.items():
+            outputs[name], seconds = _solve_all(solver, plans)
+            record(name, plans, outputs[name], seconds)
+        outputs["solve_batch"], seconds = _solve_batch(plans)
+        record("solve_batch", plans, outputs["solve_batch"], seconds)
+        optimal, seconds = _solve_all(lambda plan: min_cost_plan(plan)[0], plans)
+        record("min_cost_plan", plans, optimal, seconds)
+
+        reference = outputs["filter_plan"]
+        for name, results in outputs.items():
+            for plan, expected, result in zip(plans, reference, results):
+                if result != expected:
+                    mismatches.append(f"{name} on {plan!r}: got {result!r}, filter_plan gave {expected!r}")
+
+        for plan, expected, result in zip(plans, reference, optimal):
+            if result is None:
+                mismatches.append(f"min_cost_plan found no solution for feasible plan {plan!r}")
+                continue
+            violation = find_violation(plan, result)
+            if violation:
+                mismatches.append(f"min_cost_plan on {plan!r}: {violation}")
+            if expected is not None and result != expected:
+                mismatches.append(f"min_cost_plan on {plan!r}: got {result!r}, filter_plan gave {expected!r}")
+            if length <= ORACLE_MAX_LENGTH:
+                solutions = brute_force_solutions(plan)
+                if result != solutions[0]:
+                    mismatches.append(f"min_cost_plan on {plan!r}: got {result!r}, oracle gave {solutions[0]!r}")
+                if count_plans(plan) != len(solutions):
+                    mismatches.append(f"count_plans on {plan!r}: got {count_plans(plan)}, oracle gave {len(solutions)}")
+
+        # verify every greedy solution at once, as rows of one array
+        solved = [i for i, result in enumerate(reference) if result is not None]
+        if solved:
+            solutions = np.frombuffer("".join(reference[i] for i in solved).encode("ascii"), dtype=np.uint8)
+            violation = find_violation(rows[solved], solutions.reshape(len(solved), length))
+            if violation:
+                mismatches.append(f"filter_plan at length {length}: {violation}")
+
+    return {"mismatches": mismatches, "throughput": throughput}
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="fuzz",
+        description="Cross-check the q2 solvers on random feasible plans and report their throughput."
+    )
+    parser.add_argument("--cases", type=int, default=1000, help="Random plans per length (default: 1,000)")
+    parser.add_argument("--lengths", type=int, nargs="*", default=[4, 8, 12, 100, 10_000],
+                        help="Plan lengths; lengths up to 12 are also checked against brute force")
+    parser.add_argument("--unknown-fraction", type=float, default=0.5, help="Fraction of '?' in the plans (default: 0.5)")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed (default: 42)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    report = fuzz(args.cases, args.lengths, args.unknown_fraction, args.seed)
+    for name, totals in report["throughput"].items():
+        seconds = totals["seconds"]
+        plans_rate = totals["plans"] / seconds if seconds > 0 else float("inf")
+        chars_rate = totals["characters"] / seconds if seconds > 0 else float("inf")
+        print(f"{name:<20} {totals['plans']:>10,} plans  {totals['solved']:>10,} solved  {seconds:8.3f}s  {plans_rate:>12,.0f} plans/sec  "
+              f"{chars_rate:>14,.0f} chars/sec")
+    for mismatch in report["mismatches"]:
+        print(f"MISMATCH {mismatch}")
+    if not report["mismatches"]:
+        print("No mismatches")
+    sys.exit(1 if report["mismatches"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from benchmarks.bench import compare_reports, measure_stages
+from q1.instrumentation import stage
+
+def report(*results):
+    return {"results": [{"benchmark": name, "size": size, "median": median, "peak_memory_bytes": peak}
+                        for name, size, median, peak in results]}
+
+def test_no_regressions_within_threshold():
+    baseline = report(("q1.parse", 1000, 1.0, 100))
+    current = report(("q1.parse", 1000, 1.05, 105))
+    assert compare_reports(baseline, current, threshold=0.1, memory_threshold=0.1) == []
+
+def test_time_and_memory_regressions_are_reported():
+    baseline = report(("q1.parse", 1000, 1.0, 100), ("q2.filter_plan", 1000, 2.0, 100))
+    current = report(("q1.parse", 1000, 1.5, 100), ("q2.filter_plan", 1000, 2.0, 300))
+    assert compare_reports(baseline, current, threshold=0.1, memory_threshold=0.1) == [
+        "q1.parse size=1,000: median time 1.50x baseline",
+        "q2.filter_plan size=1,000: peak memory 3.00x baseline",
+    ]
+
+def test_benchmarks_missing_from_baseline_are_skipped():
+    baseline = report(("q1.parse", 1000, 1.0, 100))
+    current = report(("q1.parse", 10_000, 50.0, 1000), ("q1.parse.sort", 1000, 9.0, 100))
+    assert compare_reports(baseline, current, threshold=0.1, memory_threshold=0.1) == []
+
+def test_zero_baseline_never_regresses():
+    baseline = report(("q1.compute", 1000, 0.0, 0))
+    current = report(("q1.compute", 1000, 1.0, 100))
+    assert compare_reports(baseline, current, threshold=0.1, memory_threshold=0.1) == []
+
+def test_missing_metrics_are_skipped():
+    baseline = report(("q1.parse.read_csv", 1000, 1.0, None), ("q1.parse", 1000, 1.0, 100))
+    current = report(("q1.parse.read_csv", 1000, 2.0, 100), ("q1.parse", 1000, 1.0, None))
+    del current["results"][1]["median"]
+    assert compare_reports(baseline, current, threshold=0.1, memory_threshold=0.1) == [
+        "q1.parse.read_csv size=1,000: median time 2.00x baseline",
+    ]
+
+def test_stages_missing_from_the_traced_run_are_left_out():
+    calls = []
+
+    def run(arg):
+        calls.append(arg)
+        with stage("always"):
+            pass
+        if len(calls) <= 2: # the warm-up and timed runs only
+            with stage("sometimes"):
+                pass
+
+    results = measure_stages(run, lambda: None, repeat=1, warmup=1)
+    assert list(results) == ["always"]
+    assert results["always"]["peak_memory_bytes"] is not None
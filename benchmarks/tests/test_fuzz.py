@@ -0,0 +1,16 @@
+import numpy as np
+
+from benchmarks.fuzz import fuzz, random_feasible_plans
+from q2.optimal import is_feasible
+
+def test_random_plans_are_feasible():
+    plans = random_feasible_plans(200, 30, seed=1)
+    assert plans.shape == (200, 30)
+    assert set(np.unique(plans).tolist()) <= {ord("a"), ord("b"), ord("?")}
+    assert all(is_feasible(row.tobytes().decode("ascii")) for row in plans)
+
+def test_fuzz_finds_no_mismatches():
+    report = fuzz(cases=50, lengths=[1, 5, 10, 200])
+    assert report["mismatches"] == []
+    assert report["throughput"]["min_cost_plan"]["solved"] == 200
+    assert report["throughput"]["filter_plan_fast"]["characters"] == 50 * 216
@@ -0,0 +1,94 @@
+"""
+Parallel runner for many valuation files.
+
+- expand_inputs: turn a directory or glob pattern into a sorted list of CSV paths
+- run_batch: fan parse_data + calculate_total_time_weighted_return out across a process pool
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+try:
+    from q1.utils import parse_data
+    from q1.twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns
+except ImportError: # running as a script from inside q1/
+    from utils import parse_data
+    from twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns
+
+def expand_inputs(pattern: str) -> list[str]:
+    """Return the CSV files matched by a directory or glob pattern, sorted by path. Raises if nothing matches."""
+    if os.path.isdir(pattern):
+        paths = glob.glob(os.path.join(pattern, "*.csv")) + glob.glob(os.path.join(pattern, "*.CSV"))
+    else:
+        paths = glob.glob(pattern)
+    paths = sorted(set(path for path in paths if os.path.isfile(path)))
+    if not paths:
+        raise FileNotFoundError(f"No valuation files found for: {pattern}")
+    return paths
+
+def _run_file(file_path: str) -> tuple[str, Optional[pd.Series], Optional[str]]:
+    """Worker task: compute one file, returning the error message instead of raising so one bad file cannot abort the run."""
+    try:
+        df = parse_data(file_path)
+        if "portfolio_id" in df.columns:
+            return file_path, calculate_portfolio_time_weighted_returns(df), None
+        return file_path, calculate_total_time_weighted_return(df), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+def run_batch(file_paths: list[str], workers: Optional[int] = None, chunksize: int = 16) -> tuple[pd.Series, dict[str, str]]:
+    """
+    Compute the time weighted return of every file across a process pool.
+
+    Args:
+        - file_paths (list[str]) - valuation CSVs, each in the layout accepted by parse_data.
+        - workers (int) - number of worker processes, defaults to the number of CPUs. 1 runs in-process.
+        - chunksize (int) - number of files handed to a worker per task submission.
+
+    Returns:
+        - a pandas.Series of every successful file, indexed by source_file followed by the file's own index. If
+          single-portfolio and long-format files are mixed, single-portfolio results get an empty portfolio_id level
+          so every file has the same index shape.
+        - a dict mapping each failed file path to its error message.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    if workers == 1:
+        outcomes = map(_run_file, file_paths)
+        return _combine(outcomes)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _combine(pool.map(_run_file, file_paths, chunksize=chunksize))
+
+def _combine(outcomes) -> tuple[pd.Series, dict[str, str]]:
+    """Collect worker outcomes into one combined Series plus a per-file error map, in input order."""
+    results = {}
+    errors = {}
+    for file_path, series, error in outcomes:
+        if error is None:
+            results[file_path] = series
+        else:
+            errors[file_path] = error
+
+    if not results:
+        return pd.Series(dtype="float64", name='time_weighted_return'), errors
+    if any(isinstance(series.index, pd.MultiIndex) for series in results.values()):
+        # mixed single-portfolio and long-format files: give every result the (portfolio_id, valuation_date) shape
+        results = {file_path: _with_portfolio_level(series) for file_path, series in results.items()}
+    combined = pd.concat(results, names=["source_file"])
+    # single-portfolio Series carry an unnamed date index; name it so the combined output has proper headers
+    combined.index = combined.index.set_names(["valuation_date" if name is None else name for name in combined.index.names])
+    combined.name = 'time_weighted_return'
+    return combined, errors
+
+def _with_portfolio_level(series: pd.Series) -> pd.Series:
+    """Index a single-portfolio result by (portfolio_id, valuation_date) with an empty portfolio_id; long-format results pass through."""
+    if isinstance(series.index, pd.MultiIndex):
+        return series
+    index = pd.MultiIndex.from_arrays([[""] * len(series), series.index], names=["portfolio_id", "valuation_date"])
+    return series.set_axis(index)
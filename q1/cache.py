@@ -0,0 +1,141 @@
+"""
+On-disk columnar cache of parsed valuation files.
+
+- parse_data_cached: parse_data, but later runs memory-map the cached columns instead of re-parsing the CSV
+- cache_key: key a file by path, size, mtime and content hash
+- evict: keep the cache directory under a size bound, removing least recently used entries first
+
+Each entry is a directory of .npy files: valuation_date as int64 day numbers since 1970-01-01, total_valuation and
+cash_flow as float64 and, for long-format files, portfolio_id.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+try:
+    from q1.utils import parse_data
+except ImportError: # running as a script from inside q1/
+    from utils import parse_data
+
+DEFAULT_MAX_BYTES = 1024 ** 3 # 1 GiB
+_META_FILE = "meta.json"
+_HASH_BLOCK = 1024 * 1024
+
+def _content_hash(file_path: str) -> str:
+    """Hash the raw bytes of a file in blocks, so hashing never holds the file in memory."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_key(file_path: str) -> tuple[str, str]:
+    """
+    Return (path_key, version_key) for a file.
+
+    path_key identifies the file path; version_key changes whenever the size, mtime or contents change, so a stale
+    entry is never read back.
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    path_key = hashlib.blake2b(abs_path.encode(), digest_size=8).hexdigest()
+    version = f"{stat.st_size}|{stat.st_mtime_ns}|{_content_hash(abs_path)}"
+    version_key = hashlib.blake2b(version.encode(), digest_size=8).hexdigest()
+    return path_key, version_key
+
+def _load_entry(entry_dir: str) -> pd.DataFrame:
+    """Rebuild the parse_data DataFrame from memory-mapped column files."""
+    days = np.load(os.path.join(entry_dir, "valuation_date.npy"), mmap_mode="r")
+    columns = {}
+    if os.path.exists(os.path.join(entry_dir, "portfolio_id.npy")):
+        columns["portfolio_id"] = np.load(os.path.join(entry_dir, "portfolio_id.npy"), mmap_mode="r")
+    columns["valuation_date"] = days.astype("datetime64[D]").astype("datetime64[ns]")
+    columns["total_valuation"] = np.load(os.path.join(entry_dir, "total_valuation.npy"), mmap_mode="r")
+    columns["cash_flow"] = np.load(os.path.join(entry_dir, "cash_flow.npy"), mmap_mode="r")
+    return pd.DataFrame(columns, copy=False)
+
+def _write_entry(df: pd.DataFrame, cache_dir: str, entry_name: str, source_path: str) -> None:
+    """Write an entry into a temporary directory first and rename it into place, so readers never see a partial entry."""
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    try:
+        days = df["valuation_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        np.save(os.path.join(tmp_dir, "valuation_date.npy"), days)
+        np.save(os.path.join(tmp_dir, "total_valuation.npy"), df["total_valuation"].to_numpy(dtype=np.float64))
+        np.save(os.path.join(tmp_dir, "cash_flow.npy"), df["cash_flow"].to_numpy(dtype=np.float64))
+        if "portfolio_id" in df.columns:
+            portfolio_ids = df["portfolio_id"].to_numpy()
+            if portfolio_ids.dtype == object: # fixed-width strings can be memory-mapped, Python objects cannot
+                portfolio_ids = portfolio_ids.astype(str)
+            np.save(os.path.join(tmp_dir, "portfolio_id.npy"), portfolio_ids)
+        with open(os.path.join(tmp_dir, _META_FILE), "w") as f:
+            json.dump({"source_path": source_path, "rows": len(df)}, f)
+        os.rename(tmp_dir, os.path.join(cache_dir, entry_name))
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+def _entry_size(entry_dir: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+
+def evict(cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, keep: str = "") -> list[str]:
+    """
+    Remove least recently used entries until the cache directory holds at most max_bytes, never removing the entry
+    named keep. Returns the removed entry names.
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_dir() and not entry.name.startswith(".tmp-") and entry.name != keep:
+            entries.append((entry.stat().st_mtime_ns, entry.name, _entry_size(entry.path)))
+
+    total = sum(size for _, _, size in entries)
+    if keep and os.path.isdir(os.path.join(cache_dir, keep)):
+        total += _entry_size(os.path.join(cache_dir, keep))
+    removed = []
+    for _, name, size in sorted(entries): # oldest use first
+        if total <= max_bytes:
+            break
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+        removed.append(name)
+    return removed
+
+def parse_data_cached(file_path: str, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> pd.DataFrame:
+    """
+    Load and validate a CSV of valuations like parse_data, reusing a memory-mapped columnar copy when the file is unchanged.
+
+    Valuations and cash flows always come back as float64. A miss parses the file with parse_data, replaces any entry for an
+    older version of the same path and evicts least recently used entries to stay within max_bytes.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    os.makedirs(cache_dir, exist_ok=True)
+
+    path_key, version_key = cache_key(file_path)
+    entry_name = f"{path_key}-{version_key}"
+    entry_dir = os.path.join(cache_dir, entry_name)
+
+    if os.path.isdir(entry_dir):
+        os.utime(entry_dir) # mark as recently used for eviction
+        return _load_entry(entry_dir)
+
+    df = parse_data(file_path)
+
+    # invalidate entries for older versions of the same file
+    for entry in os.scandir(cache_dir):
+        if entry.is_dir() and entry.name.startswith(f"{path_key}-"):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    try:
+        _write_entry(df, cache_dir, entry_name, os.path.abspath(file_path))
+    except OSError:
+        if not os.path.isdir(entry_dir):
+            raise
+        # a concurrent run wrote the same entry first
+    evict(cache_dir, max_bytes, keep=entry_name)
+    return _load_entry(entry_dir) # same float64 columns on a miss as on a hit
@@ -0,0 +1,93 @@
+"""
+Incremental TWR updates from a persisted checkpoint.
+
+- TWRCheckpoint: the state needed to continue a TWR series (last date, last valuation, running factor)
+- load_checkpoint / save_checkpoint: JSON persistence of a checkpoint
+- calculate_incremental_time_weighted_return: extend a series with new rows only, in O(new rows)
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+try:
+    from q1.twr import _chained_twr, _valuation_dates
+except ImportError: # running as a script from inside q1/
+    from twr import _chained_twr, _valuation_dates
+
+@dataclass(frozen=True)
+class TWRCheckpoint:
+    """State carried between runs: the last valuation date, the last total valuation and the running growth factor."""
+    last_date: pd.Timestamp
+    last_valuation: float
+    running_factor: float
+
+def load_checkpoint(path: str) -> TWRCheckpoint:
+    """Load a checkpoint written by save_checkpoint. Raises ValueError if the file is not a valid checkpoint."""
+    try:
+        with open(path) as f:
+            raw = json.load(f)
+        return TWRCheckpoint(
+            last_date=pd.Timestamp(raw["last_date"]),
+            last_valuation=raw["last_valuation"],
+            running_factor=raw["running_factor"],
+        )
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid checkpoint file '{path}': {e}")
+
+def save_checkpoint(checkpoint: TWRCheckpoint, path: str) -> None:
+    """Write a checkpoint as JSON, replacing any previous file atomically. Floats round-trip exactly through JSON."""
+    raw = {
+        "last_date": checkpoint.last_date.strftime("%Y-%m-%d"),
+        "last_valuation": checkpoint.last_valuation,
+        "running_factor": checkpoint.running_factor,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(raw, f)
+    os.replace(tmp_path, path)
+
+def calculate_incremental_time_weighted_return(new_data: pd.DataFrame,
+                                               checkpoint: Optional[TWRCheckpoint] = None) -> tuple[pd.Series, TWRCheckpoint]:
+    """
+    Returns the total time weighted return for new rows only, continuing from a checkpoint.
+
+    Args:
+        - new_data (pandas.DataFrame) - rows after the checkpoint, with the same columns as calculate_total_time_weighted_return
+          and sorted by date. With no checkpoint this is the full history.
+        - checkpoint (TWRCheckpoint) - state after the last processed row, or None to start a new series.
+
+    Returns:
+        - a pandas.Series of the new TWR points, bit-identical to the same rows of a full recompute.
+        - the updated checkpoint.
+
+    A checkpoint continues one series, so long-format data (with a portfolio_id column) raises a ValueError.
+    """
+    if "portfolio_id" in new_data.columns:
+        raise ValueError("A checkpoint holds a single portfolio; split long-format data by 'portfolio_id' first")
+    if new_data.empty:
+        if checkpoint is None:
+            raise ValueError("Cannot create a checkpoint from an empty valuation history")
+        return pd.Series(data=[], index=pd.DatetimeIndex([]), name='time_weighted_return', dtype="float64"), checkpoint
+
+    dates = _valuation_dates(new_data)
+    valuations = new_data["total_valuation"].to_numpy()
+
+    if checkpoint is None:
+        twr_values, running_factor = _chained_twr(valuations, new_data["cash_flow"].to_numpy())
+        twr_values[0] = 0.0 # first row is 0 as a convention
+    else:
+        if dates[0] <= checkpoint.last_date.to_datetime64():
+            raise ValueError(f"New rows must be dated after the checkpoint's last date ({checkpoint.last_date:%d/%m/%Y})")
+        twr_values, running_factor = _chained_twr(valuations, new_data["cash_flow"].to_numpy(),
+                                                  checkpoint.running_factor, checkpoint.last_valuation)
+
+    updated = TWRCheckpoint(
+        last_date=pd.Timestamp(dates[-1]),
+        last_valuation=float(valuations[-1]),
+        running_factor=running_factor,
+    )
+    return pd.Series(data=twr_values, index=pd.DatetimeIndex(dates), name='time_weighted_return'), updated
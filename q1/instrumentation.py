@@ -0,0 +1,162 @@
+"""
+Per-stage timing and memory instrumentation for the TWR pipeline.
+
+- stage: context manager wrapped around each pipeline stage (read_csv, validate, sort, twr, output)
+- collect: enable instrumentation for a block of code and gather a StageRecord per stage, optionally calling a hook
+- attempt: wrap work that may be abandoned (e.g. a fast path with a fallback), dropping its records if it raises
+- format_summary: render collected records as a table for the --timings CLI flag
+
+Instrumentation is off unless a collect() block is active. Stages then share one no-op context manager, so the
+overhead is a function call and an attribute check per stage, never per row. Stages may nest: tracemalloc has one
+process-wide peak, so each stage carries the peaks its nested stages reset into the stage around it.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterator, Optional
+
+@dataclass
+class StageRecord:
+    """Metrics for one run of one pipeline stage. peak_memory_bytes is None unless memory tracking was requested."""
+    stage: str
+    seconds: float
+    rows: Optional[int] = None
+    peak_memory_bytes: Optional[int] = None
+
+    @property
+    def rows_per_sec(self) -> Optional[float]:
+        if self.rows is None or self.seconds <= 0:
+            return None
+        return self.rows / self.seconds
+
+    def to_dict(self) -> dict:
+        """Structured form for orchestrators: the dataclass fields plus rows_per_sec."""
+        return {**asdict(self), "rows_per_sec": self.rows_per_sec}
+
+class _Collector:
+    def __init__(self, hook: Optional[Callable[[StageRecord], None]], track_memory: bool):
+        self.records = []
+        self.hook = hook
+        self.track_memory = track_memory
+        self.open_stages = [] # innermost last
+        self.attempts = 0 # hooks wait while an attempt() block may still drop its records
+
+    def add(self, record: StageRecord) -> None:
+        self.records.append(record)
+        if self.hook is not None and not self.attempts:
+            self.hook(record)
+
+class _Stage:
+    """An active stage. Set .rows inside the block when the row count is only known part-way through."""
+    def __init__(self, name: str, rows: Optional[int], collector: _Collector):
+        self.name = name
+        self.rows = rows
+        self._collector = collector
+
+    def __enter__(self):
+        if self._collector.track_memory:
+            traced, peak = tracemalloc.get_traced_memory()
+            if self._collector.open_stages: # the reset below would lose the enclosing stage's peak so far
+                outer = self._collector.open_stages[-1]
+                outer._peak = max(outer._peak, peak)
+            tracemalloc.reset_peak()
+            self._start_memory = traced
+            self._peak = traced
+        self._collector.open_stages.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        self._collector.open_stages.pop()
+        peak = None
+        if self._collector.track_memory:
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            if self._collector.open_stages:
+                outer = self._collector.open_stages[-1]
+                outer._peak = max(outer._peak, self._peak)
+            peak = max(self._peak - self._start_memory, 0)
+        if exc_type is None: # failed stages are not recorded
+            self._collector.add(StageRecord(self.name, seconds, self.rows, peak))
+        return False
+
+class _NullStage:
+    """Shared no-op stage used while instrumentation is disabled; assigning .rows is harmless."""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_STAGE = _NullStage()
+_active: Optional[_Collector] = None
+
+def stage(name: str, rows: Optional[int] = None):
+    """Context manager measuring one pipeline stage while a collect() block is active; a no-op otherwise."""
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(name, rows, _active)
+
+@contextmanager
+def collect(hook: Optional[Callable[[StageRecord], None]] = None, track_memory: bool = False) -> Iterator[list[StageRecord]]:
+    """
+    Enable instrumentation for the enclosed block and yield the list that StageRecords are appended to.
+
+    Args:
+        - hook (callable) - called with each StageRecord as soon as its stage finishes, e.g. to forward metrics.
+        - track_memory (bool) - also record each stage's peak traced memory. This starts tracemalloc for the block,
+          which slows allocation-heavy stages noticeably, so it is off by default.
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("Instrumentation is already being collected")
+
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = _Collector(hook, track_memory)
+    try:
+        yield _active.records
+    finally:
+        _active = None
+        if started_tracing:
+            tracemalloc.stop()
+
+@contextmanager
+def attempt() -> Iterator[None]:
+    """
+    Keep the stages recorded inside the block only if it completes. Wrap work that is abandoned by raising, such as a
+    fast path that falls back to a reference path, so the records describe only the path that produced the result.
+    Hooks for the block's records are called when it completes.
+    """
+    collector = _active
+    if collector is None:
+        yield
+        return
+    mark = len(collector.records)
+    collector.attempts += 1
+    try:
+        yield
+    except BaseException:
+        del collector.records[mark:]
+        raise
+    finally:
+        collector.attempts -= 1
+    if collector.hook is not None and not collector.attempts:
+        for record in collector.records[mark:]:
+            collector.hook(record)
+
+def format_summary(records: list[StageRecord]) -> str:
+    """Render records as a fixed-width table, one line per stage plus a total."""
+    lines = [f"{'stage':<10} {'seconds':>10} {'rows':>12} {'rows/sec':>14} {'peak MB':>9}"]
+    for record in records:
+        rows = f"{record.rows:,}" if record.rows is not None else "-"
+        rate = f"{record.rows_per_sec:,.0f}" if record.rows_per_sec is not None else "-"
+        peak = f"{record.peak_memory_bytes / 1e6:.1f}" if record.peak_memory_bytes is not None else "-"
+        lines.append(f"{record.stage:<10} {record.seconds:>10.4f} {rows:>12} {rate:>14} {peak:>9}")
+    lines.append(f"{'total':<10} {sum(record.seconds for record in records):>10.4f}")
+    return "\n".join(lines)
@@ -0,0 +1,88 @@
+"""
+Pure-Python fast path for small valuation files.
+
+Importing pandas and numpy takes several hundred milliseconds, which dominates runtime for small per-client files.
+This module only uses the standard library, so the CLI can compute small files without those imports.
+
+- lite_time_weighted_return: parse, validate and compute a single-portfolio file, or return None when the file needs
+  the full pandas path (any validation problem, long-format files or anything unusual), so errors are reported by
+  parse_data with exactly the same messages. Numbers in exponent form or with more digits than pandas' float
+  converter handles exactly also defer, so the values are always bit-identical to the pandas path.
+"""
+
+import csv
+import re
+from datetime import datetime
+from typing import Optional
+
+# pandas' default missing-value markers, so a value pandas would treat as null is never parsed here
+_NA_VALUES = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+              "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+_REQUIRED_COLS = ("valuation_date", "total_valuation", "cash_flow")
+# plain decimal numbers only; float() also accepts forms like "1_000" or "infinity" that pandas would reject, and
+# exponent forms are left to pandas as it may round them differently
+_NUMBER = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)")
+# pandas' C reader has its own float converter, which only agrees with Python's correctly rounded float() on plain
+# decimals with at most 15 significant digits and 16 digits after the point; anything longer defers to pandas
+_MAX_SIGNIFICANT_DIGITS = 15
+_MAX_FRACTION_DIGITS = 16
+
+def _parse_number(text: str) -> Optional[float]:
+    """Return text as a float, or None if it is not a plain decimal that pandas is guaranteed to parse identically."""
+    if not _NUMBER.fullmatch(text):
+        return None
+    integer, _, fraction = text.lstrip("+-").partition(".")
+    if len(fraction) > _MAX_FRACTION_DIGITS or len((integer + fraction).lstrip("0")) > _MAX_SIGNIFICANT_DIGITS:
+        return None
+    return float(text)
+
+def _read_rows(file_path: str) -> Optional[list[tuple[datetime, float, float]]]:
+    """Return (date, valuation, cash flow) rows sorted by date, or None if the file is not plainly valid."""
+    try:
+        with open(file_path, newline="") as f:
+            reader = csv.reader(f, strict=True)
+            header = next(reader, None)
+            if header is None or "portfolio_id" in header or not set(_REQUIRED_COLS) <= set(header):
+                return None
+            date_col, val_col, cf_col = (header.index(col) for col in _REQUIRED_COLS)
+
+            rows = []
+            for fields in reader:
+                if len(fields) != len(header):
+                    return None
+                date, valuation, cash_flow = fields[date_col], _parse_number(fields[val_col]), _parse_number(fields[cf_col])
+                if date in _NA_VALUES or valuation is None or cash_flow is None:
+                    return None
+                rows.append((datetime.strptime(date, "%d/%m/%Y"), valuation, cash_flow))
+    except (OSError, UnicodeDecodeError, csv.Error, ValueError):
+        return None
+
+    if not rows:
+        return None
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+def lite_time_weighted_return(file_path: str) -> Optional[list[tuple[str, float]]]:
+    """
+    Returns (ISO date, total time weighted return) pairs for a valid single-portfolio CSV, or None to defer to the
+    full pandas path. Uses the same rules as calculate_total_time_weighted_return: the first row is 0 and a zero
+    previous valuation gives a factor of 1.0.
+    """
+    rows = _read_rows(file_path)
+    if rows is None:
+        return None
+
+    results = []
+    running_factor = 1.0
+    prev_val = None
+    for date, current_val, cash_flow in rows:
+        if prev_val is None: # first row is 0 as a convention
+            results.append((date.date().isoformat(), 0.0))
+            prev_val = current_val
+            continue
+
+        factor = (current_val - cash_flow) / prev_val if prev_val != 0 else 1.0
+        running_factor *= factor
+        results.append((date.date().isoformat(), running_factor - 1))
+        prev_val = current_val
+    return results
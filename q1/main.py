@@ -1,9 +1,25 @@
 import sys
+import os
+import glob
 import argparse
-import pandas as pd
+import cProfile
+from contextlib import nullcontext
+from typing import Optional
 
-from utils import parse_data
-from twr import calculate_total_time_weighted_return
+# only standard-library modules are imported up front: pandas and numpy take most of the startup time for small
+# files, so every module that needs them is imported inside the function that uses it
+try:
+    # the same import path as the library modules, so the stages they record reach this module's collect()
+    from q1.instrumentation import collect, stage, format_summary
+except ImportError: # running as a script from inside q1/
+    from instrumentation import collect, stage, format_summary
+
+# literal copies of utils.CSV_ENGINES, periods.PERIOD_FREQUENCIES, cache.DEFAULT_MAX_BYTES and writers.OUTPUT_FORMATS,
+# so --help and argument errors never import pandas
+CSV_ENGINES = ("c", "pyarrow")
+OUTPUT_FORMATS = ("csv", "parquet", "arrow", "npy")
+PERIOD_FREQUENCIES = ("M", "Q", "Y")
+DEFAULT_CACHE_MAX_BYTES = 1024 ** 3
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -11,20 +27,268 @@ def parse_args():
         description="Compute the time-weighted return for a valuation CSV."
     )
     parser.add_argument(
-        "input_file",
-        help="Path to the CSV file with columns: valuation_date, total_valuation, cash_flow"
+        "input_file", nargs="?",
+        help="Path to the CSV file with columns: valuation_date, total_valuation, cash_flow (and optionally portfolio_id). "
+             "A directory or glob pattern runs every matching file in parallel."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Number of worker processes for directory/glob runs (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=16,
+        help="Number of files submitted to a worker at a time for directory/glob runs (default: 16)"
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the full results to this file instead of printing them. Multi-portfolio and directory/glob runs "
+             "write one combined file"
+    )
+    parser.add_argument(
+        "--output-format", choices=OUTPUT_FORMATS,
+        help="Format for --output; parquet and arrow require pyarrow (default: inferred from the extension, else csv)"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Stream a date-sorted file in fixed-size chunks, writing results incrementally as CSV (memory bounded by --chunk-rows)"
+    )
+    parser.add_argument(
+        "--merge", action="store_true",
+        help="Treat the directory/glob input as date-sorted pieces of one portfolio's history (e.g. monthly files), "
+             "merge them in a streaming k-way merge and write one TWR series like --stream. Dates repeated across files raise an error"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=1_000_000,
+        help="Rows read per chunk (per file with --merge) in --stream and --merge modes (default: 1,000,000)"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Incremental mode: input_file holds only rows after this checkpoint (or the full history if it does not exist yet). "
+             "Prints the new TWR points and writes the updated checkpoint back to the same path"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Cache parsed columns in this directory and memory-map them on later runs of an unchanged file"
+    )
+    parser.add_argument(
+        "--cache-max-bytes", type=int, default=DEFAULT_CACHE_MAX_BYTES,
+        help="Size bound for --cache-dir; least recently used entries are evicted first (default: 1 GiB)"
+    )
+    parser.add_argument(
+        "--rolling", type=int, metavar="DAYS",
+        help="Print the trailing DAYS-day TWR at every date instead of the cumulative TWR"
+    )
+    parser.add_argument(
+        "--periods", choices=PERIOD_FREQUENCIES,
+        help="Print the TWR of every calendar month (M), quarter (Q) or year (Y) instead of the cumulative TWR"
+    )
+    parser.add_argument(
+        "--fast-parse", action="store_true",
+        help="Use the low-copy ingestion path: explicit dtypes, fused validation and no sort for files already in date order"
+    )
+    parser.add_argument(
+        "--csv-engine", choices=CSV_ENGINES, default="c",
+        help="CSV reader for --fast-parse; 'pyarrow' requires pyarrow to be installed (default: c)"
+    )
+    parser.add_argument(
+        "--timings", action="store_true",
+        help="Print the wall time, rows/sec and peak memory of each pipeline stage to stderr"
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH",
+        help="Write a cProfile dump of the run to PATH (inspect with python -m pstats PATH)"
+    )
+    parser.add_argument(
+        "--lite", action="store_true",
+        help="Compute a small single-portfolio file in pure Python without importing pandas/numpy, printing CSV. "
+             "Files it cannot handle fall back to the normal path"
+    )
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="Run as a long-lived service reading JSON jobs, one per line, from stdin (or --socket) and writing JSON responses"
+    )
+    parser.add_argument(
+        "--socket", metavar="PATH",
+        help="With --serve, listen on a Unix domain socket at PATH instead of stdin/stdout"
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.input_file is None and not args.serve:
+        parser.error("the following arguments are required: input_file")
+    conflict = mode_conflict(args)
+    if conflict:
+        parser.error(conflict)
+    return args
 
-def main():
-    args = parse_args()
-    try:
+def mode_conflict(args) -> Optional[str]:
+    """
+    Describe a flag that the selected mode would ignore, or return None. Modes are chosen in the order run() checks
+    them (--serve, --merge, directory/glob input, --stream, --checkpoint), and each one replaces the single-file
+    pipeline that --cache-dir, --rolling and --periods configure, so none of these flags may be combined with another.
+    """
+    flags = {"--stream": args.stream, "--checkpoint": args.checkpoint, "--cache-dir": args.cache_dir,
+             "--rolling": args.rolling, "--periods": args.periods}
+    chosen = [flag for flag, value in flags.items() if value not in (None, False)]
+    if args.serve:
+        mode = "--serve"
+    elif args.merge:
+        mode = "--merge"
+    elif is_batch_input(args.input_file):
+        mode = "a directory/glob input"
+    elif chosen:
+        mode = chosen.pop(0)
+    else:
+        return None
+    if chosen:
+        return f"{chosen[0]} cannot be combined with {mode}"
+    return None
+
+def is_batch_input(input_file: str) -> bool:
+    """A directory or glob pattern selects the parallel multi-file mode."""
+    return os.path.isdir(input_file) or glob.has_magic(input_file)
+
+def run_many(args) -> None:
+    from batch import expand_inputs, run_batch
+
+    file_paths = expand_inputs(args.input_file)
+    twr_series, errors = run_batch(file_paths, workers=args.workers, chunksize=args.chunksize)
+
+    for file_path, error in errors.items():
+        print(f"Error in {file_path}: {error}", file=sys.stderr)
+    print(f"Processed {len(file_paths)} files: {len(file_paths) - len(errors)} succeeded, {len(errors)} failed", file=sys.stderr)
+
+    output(twr_series, args)
+
+def output(twr_series, args) -> None:
+    """Write the results to --output in bulk, or print them."""
+    with stage("output", rows=len(twr_series)):
+        if args.output:
+            from writers import write_series
+            write_series(twr_series, args.output, args.output_format)
+        else:
+            print(twr_series)
+
+def write_stream(chunks, args) -> None:
+    """Compute the TWR of a stream of date-sorted chunks, writing each result chunk to --output or stdout as it is produced."""
+    from twr import stream_time_weighted_return
+
+    if args.output:
+        from writers import open_writer
+        with open_writer(args.output, args.output_format) as writer:
+            stream_time_weighted_return(chunks, writer.write)
+        return
+
+    sys.stdout.write("valuation_date,time_weighted_return\n")
+    sink = lambda twr_chunk: twr_chunk.to_csv(sys.stdout, header=False)
+    stream_time_weighted_return(chunks, sink)
+
+def run_stream(args) -> None:
+    from utils import iter_valuation_chunks
+    write_stream(iter_valuation_chunks(args.input_file, args.chunk_rows), args)
+
+def run_merged(args) -> None:
+    from batch import expand_inputs
+    from utils import iter_merged_valuation_chunks
+    write_stream(iter_merged_valuation_chunks(expand_inputs(args.input_file), args.chunk_rows), args)
+
+def run_incremental(args) -> None:
+    from utils import parse_data
+    from incremental import calculate_incremental_time_weighted_return, load_checkpoint, save_checkpoint
+
+    checkpoint = load_checkpoint(args.checkpoint) if os.path.exists(args.checkpoint) else None
+    df = parse_data(args.input_file)
+    twr_series, checkpoint = calculate_incremental_time_weighted_return(df, checkpoint)
+    output(twr_series, args)
+    # only advance the checkpoint once the new points are out, so a failed output can be rerun with the same rows
+    save_checkpoint(checkpoint, args.checkpoint)
+
+def run_lite(args) -> None:
+    """Pure-Python path: no pandas/numpy import unless the file has to fall back to parse_data."""
+    from lite import lite_time_weighted_return
+
+    with stage("twr"):
+        results = lite_time_weighted_return(args.input_file)
+    if results is None:
+        from utils import parse_data
+        from twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns
         df = parse_data(args.input_file)
+        if "portfolio_id" in df.columns:
+            twr_series = calculate_portfolio_time_weighted_returns(df)
+        else:
+            twr_series = calculate_total_time_weighted_return(df).rename_axis("valuation_date")
+        with stage("output", rows=len(twr_series)):
+            twr_series.to_csv(sys.stdout)
+        return
+
+    with stage("output", rows=len(results)):
+        lines = [f"{date},{value!r}" for date, value in results]
+        sys.stdout.write("valuation_date,time_weighted_return\n" + "\n".join(lines) + "\n")
+
+def run_service(args) -> None:
+    import asyncio
+    from service import serve_stdio, serve_socket
+
+    if args.socket:
+        asyncio.run(serve_socket(args.socket, workers=args.workers))
+    else:
+        asyncio.run(serve_stdio(workers=args.workers))
+
+def run(args) -> None:
+    if args.serve:
+        run_service(args)
+        return
+    if args.merge:
+        run_merged(args)
+        return
+    if is_batch_input(args.input_file):
+        run_many(args)
+        return
+    if args.stream:
+        run_stream(args)
+        return
+    if args.checkpoint:
+        run_incremental(args)
+        return
+    simple_mode = not (args.cache_dir or args.rolling or args.periods or args.fast_parse or args.output)
+    if args.lite and simple_mode:
+        run_lite(args)
+        return
+
+    from utils import parse_data
+    from twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns
+    if args.cache_dir:
+        from cache import parse_data_cached
+        df = parse_data_cached(args.input_file, args.cache_dir, args.cache_max_bytes)
+    else:
+        df = parse_data(args.input_file, fast=args.fast_parse, engine=args.csv_engine)
+    if args.rolling:
+        from periods import rolling_time_weighted_return
+        twr_series = rolling_time_weighted_return(df, args.rolling)
+    elif args.periods:
+        from periods import period_time_weighted_returns
+        twr_series = period_time_weighted_returns(df, args.periods)
+    elif "portfolio_id" in df.columns:
+        twr_series = calculate_portfolio_time_weighted_returns(df)
+    else:
         twr_series = calculate_total_time_weighted_return(df)
-        print(twr_series)
-    except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
+    output(twr_series, args)
+
+def main():
+    args = parse_args()
+    profiler = cProfile.Profile() if args.profile else None
+    with (collect(track_memory=True) if args.timings else nullcontext([])) as records:
+        try:
+            if profiler is not None:
+                profiler.enable()
+            run(args)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(args.profile)
+    if args.timings:
+        print(format_summary(records), file=sys.stderr)
 
 
 if __name__ =="__main__":
-    main()
\ No newline at end of file
+    main()
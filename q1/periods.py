@@ -0,0 +1,94 @@
+"""
+Rolling-window, calendar-period and annualised TWR outputs.
+
+- rolling_time_weighted_return: trailing N-day TWR at every valuation date, from prefix growth factors
+- period_time_weighted_returns: per-month, per-quarter or per-year TWR from a grouped product of sub-period factors
+- annualise_return / annualised_time_weighted_return: convert returns over a number of days to annual rates
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from q1.twr import sub_period_factors, _valuation_dates
+    from q1.range_index import TWRRangeIndex
+except ImportError: # running as a script from inside q1/
+    from twr import sub_period_factors, _valuation_dates
+    from range_index import TWRRangeIndex
+
+DAYS_PER_YEAR = 365.25
+PERIOD_FREQUENCIES = ("M", "Q", "Y")
+
+def annualise_return(returns, days):
+    """Returns the annual rate equivalent to returns earned over the given number of days, element-wise."""
+    return np.power(1 + np.asarray(returns, dtype=np.float64), DAYS_PER_YEAR / np.asarray(days, dtype=np.float64)) - 1
+
+def _ensure_single_portfolio(data: pd.DataFrame) -> None:
+    if "portfolio_id" in data.columns:
+        raise ValueError("Rolling and period returns need a single portfolio; split long-format data by 'portfolio_id' first")
+
+def rolling_time_weighted_return(data: pd.DataFrame, window_days: int, annualise: bool = False) -> pd.Series:
+    """
+    Returns the trailing window_days TWR at every valuation date.
+
+    Args:
+        - data (pandas.DataFrame) - laid out like parse_data's output, for a single portfolio and sorted by date.
+        - window_days (int) - calendar days in the window. The window ending on date t is based on the last valuation
+          on or before t - window_days and covers the rows from that base up to t, computed as
+          calculate_total_time_weighted_return would on that slice. When valuations are not daily, the window can
+          therefore span more than window_days.
+        - annualise (bool) - convert each window's return to an annual rate over the window's actual span.
+
+    Returns:
+        - a pandas.Series indexed by date. Dates with no valuation on or before t - window_days are NaN.
+    """
+    if window_days < 1:
+        raise ValueError("window_days must be at least 1")
+    _ensure_single_portfolio(data)
+
+    dates = _valuation_dates(data)
+    index = TWRRangeIndex(dates, data["total_valuation"].to_numpy(), data["cash_flow"].to_numpy())
+    bases = np.searchsorted(dates, dates - np.timedelta64(window_days, "D"), side="right") - 1
+    full = bases >= 0 # a base valuation exists, otherwise there is not enough history for a full window
+    returns = np.full(len(dates), np.nan)
+    base_dates = dates[bases[full]]
+    returns[full] = index.twr_many(base_dates, dates[full])
+    if annualise:
+        spans = (dates[full] - base_dates) / np.timedelta64(1, "D")
+        returns[full] = annualise_return(returns[full], spans)
+
+    return pd.Series(data=returns, index=pd.DatetimeIndex(dates), name=f'rolling_{window_days}d_time_weighted_return')
+
+def period_time_weighted_returns(data: pd.DataFrame, freq: str = "M") -> pd.Series:
+    """
+    Returns the TWR of every calendar period, chain-linked so the periods compound to the total TWR.
+
+    Args:
+        - data (pandas.DataFrame) - laid out like parse_data's output, for a single portfolio and sorted by date.
+        - freq (str) - "M" for months, "Q" for quarters or "Y" for years.
+
+    Returns:
+        - a pandas.Series indexed by pandas.Period. Each period compounds the sub-period factors of the rows dated
+          inside it, so its base is the last valuation of the previous period.
+    """
+    if freq not in PERIOD_FREQUENCIES:
+        raise ValueError(f"Unknown period frequency '{freq}'. Expected one of: {', '.join(PERIOD_FREQUENCIES)}")
+    _ensure_single_portfolio(data)
+
+    factors = sub_period_factors(data["total_valuation"].to_numpy(), data["cash_flow"].to_numpy())
+    periods = pd.DatetimeIndex(_valuation_dates(data)).to_period(freq)
+    growth = pd.Series(factors).groupby(periods, sort=True).prod()
+
+    result = growth - 1
+    result.name = 'time_weighted_return'
+    result.index.name = 'period'
+    return result
+
+def annualised_time_weighted_return(data: pd.DataFrame) -> float:
+    """Returns the total TWR of the whole history as an annual rate, using the calendar days between the first and last valuation."""
+    dates = _valuation_dates(data)
+    if len(dates) < 2 or dates[-1] == dates[0]:
+        raise ValueError("At least two distinct valuation dates are needed to annualise a return")
+    total = np.prod(sub_period_factors(data["total_valuation"].to_numpy(), data["cash_flow"].to_numpy())) - 1
+    days = (dates[-1] - dates[0]) / np.timedelta64(1, "D")
+    return float(annualise_return(total, days))
@@ -0,0 +1,80 @@
+"""
+Precomputed prefix index for TWR between arbitrary date pairs.
+
+- TWRRangeIndex: prefix growth factors plus a sorted date array, answering "TWR from d1 to d2" in O(log n)
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from q1.twr import sub_period_factors, _valuation_dates
+except ImportError: # running as a script from inside q1/
+    from twr import sub_period_factors, _valuation_dates
+
+class TWRRangeIndex:
+    """
+    Answers TWR queries over any date range of one valuation history.
+
+    A query from d1 to d2 returns the same value as calculate_total_time_weighted_return on the rows dated within
+    [d1, d2], taking its last value, to floating point precision: the first row in range is the base and every later
+    row contributes its sub-period factor, with the same zero-valuation rule. Ranges holding no rows give NaN.
+
+    Sub-period factors of exactly zero (a total loss) are counted separately rather than multiplied into the prefix
+    product, so a range that contains one returns -1 and ranges after it are unaffected.
+    """
+
+    def __init__(self, dates: np.ndarray, valuations: np.ndarray, cash_flows: np.ndarray):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        if np.any(self.dates[1:] < self.dates[:-1]):
+            raise ValueError("Valuation dates must be sorted to build a range index")
+
+        factors = sub_period_factors(np.asarray(valuations), np.asarray(cash_flows))
+        zero = factors == 0
+        self._growth = np.cumprod(np.where(zero, 1.0, factors)) # prefix growth over non-zero factors
+        self._zeros = np.cumsum(zero) # prefix count of zero factors
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "TWRRangeIndex":
+        """Build the index from a DataFrame laid out like parse_data's output."""
+        return cls(_valuation_dates(data), data["total_valuation"].to_numpy(), data["cash_flow"].to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def twr_many(self, starts, ends) -> np.ndarray:
+        """
+        Returns the TWR for many date pairs in one vectorized call.
+
+        Args:
+            - starts, ends (array-like of dates) - range bounds, inclusive. Anything pandas.to_datetime accepts.
+
+        Returns:
+            - a float64 numpy.ndarray, one value per pair. NaN where no valuation falls inside the range.
+        """
+        starts = pd.to_datetime(np.atleast_1d(starts)).to_numpy(dtype="datetime64[ns]")
+        ends = pd.to_datetime(np.atleast_1d(ends)).to_numpy(dtype="datetime64[ns]")
+        if starts.shape != ends.shape:
+            raise ValueError("starts and ends must have the same length")
+        if np.any(ends < starts):
+            raise ValueError("Each range must end on or after its start date")
+
+        if len(self.dates) == 0:
+            return np.full(len(starts), np.nan)
+
+        first = np.searchsorted(self.dates, starts, side="left") # first row dated on or after the start
+        last = np.searchsorted(self.dates, ends, side="right") - 1 # last row dated on or before the end
+        empty = last < first
+
+        # clip so empty ranges can be indexed safely, their result is overwritten with NaN below
+        first = np.minimum(first, len(self.dates) - 1)
+        last = np.maximum(last, 0)
+
+        result = self._growth[last] / self._growth[first] - 1
+        result[self._zeros[last] > self._zeros[first]] = -1.0 # a zero factor inside the range wipes out the growth
+        result[empty] = np.nan
+        return result
+
+    def twr(self, start, end) -> float:
+        """Returns the TWR from start to end (inclusive), as calculate_total_time_weighted_return on that slice would."""
+        return float(self.twr_many([start], [end])[0])
@@ -0,0 +1,165 @@
+"""
+What-if scenarios over one valuation history, computed as a matrix.
+
+- iter_scenario_blocks: TWR paths of all scenarios as 2-D arrays, a block of scenarios at a time
+- calculate_scenario_time_weighted_returns: TWR paths of all scenarios as one DataFrame, a column per scenario
+
+A scenario replaces some or all of the base history's cash flows and/or valuations. Alternatives are given either
+as an S x N matrix (one row per scenario, one column per valuation date) or as a sparse list of S mappings from
+valuation date to replacement value. Each block of scenarios is built by broadcasting the base history and applying
+the replacements, then goes through sub_period_factors and a cumulative product along the date axis: the same
+arithmetic, and the same zero-valuation rule, as calculate_total_time_weighted_return, with no copy of the frame
+and no Python loop per scenario.
+"""
+
+from typing import Iterator, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from q1.instrumentation import stage
+    from q1.twr import sub_period_factors, _valuation_dates
+    from q1.utils import parse_dates
+    from q1.valuation_series import ValuationSeries
+except ImportError: # running as a script from inside q1/
+    from instrumentation import stage
+    from twr import sub_period_factors, _valuation_dates
+    from utils import parse_dates
+    from valuation_series import ValuationSeries
+
+DEFAULT_BLOCK_BYTES = 64 * 2 ** 20
+_ARRAYS_PER_BLOCK = 4 # valuations, cash flows, factors and the TWR output are live at once per block
+
+Alternatives = Union[np.ndarray, Sequence[Mapping]]
+
+class _Alternatives:
+    """
+    One field's alternatives for S scenarios, dense or sparse, materialised a block of scenarios at a time.
+
+    Sparse replacements are flattened into three aligned arrays (scenario, row position, value) with the offset of
+    each scenario's first replacement, so a block is filled with one fancy-indexed assignment.
+    """
+
+    def __init__(self, base: np.ndarray, dates: np.ndarray, alternatives: Optional[Alternatives], name: str):
+        self.base = base
+        self.dense = None
+        self.sparse = None
+        if alternatives is None:
+            self.count = None
+        elif isinstance(alternatives, np.ndarray) or (len(alternatives) and not isinstance(alternatives[0], Mapping)):
+            self.dense = np.asarray(alternatives, dtype=np.float64)
+            if self.dense.ndim != 2 or self.dense.shape[1] != len(base):
+                raise ValueError(f"{name} must have shape (scenarios, {len(base)}), got {self.dense.shape}")
+            self.count = len(self.dense)
+        else:
+            self.sparse = self._flatten(alternatives, dates, name)
+            self.count = len(alternatives)
+
+    @staticmethod
+    def _flatten(alternatives: Sequence[Mapping], dates: np.ndarray, name: str) -> tuple[np.ndarray, ...]:
+        """Map every scenario's {date: value} replacements to row positions of the base history, in one pass."""
+        sizes = np.fromiter((len(changes) for changes in alternatives), dtype=np.int64, count=len(alternatives))
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        scenarios = np.repeat(np.arange(len(alternatives)), sizes)
+        keys = [key for changes in alternatives for key in changes]
+        if keys and all(isinstance(key, str) for key in keys): # dates written as in the CSV input
+            keys = parse_dates(pd.Series(keys, dtype=object), "%d/%m/%Y")
+        keys = pd.to_datetime(keys).to_numpy(dtype="datetime64[ns]")
+        values = np.fromiter((value for changes in alternatives for value in changes.values()), dtype=np.float64,
+                             count=int(offsets[-1]))
+        positions = np.searchsorted(dates, keys)
+        found = positions < len(dates)
+        found[found] = dates[positions[found]] == keys[found]
+        if not found.all():
+            missing = int((~found).argmax())
+            raise ValueError(f"No valuation on {pd.Timestamp(keys[missing]):%d/%m/%Y} to replace in {name} of "
+                             f"scenario {scenarios[missing]}")
+        return offsets, scenarios, positions, values
+
+    def block(self, start: int, stop: int) -> np.ndarray:
+        if self.dense is not None:
+            return self.dense[start:stop]
+        values = np.broadcast_to(self.base, (stop - start, len(self.base)))
+        if self.sparse is None:
+            return values
+        offsets, scenarios, positions, replacements = self.sparse
+        changes = slice(offsets[start], offsets[stop])
+        values = values.copy()
+        values[scenarios[changes] - start, positions[changes]] = replacements[changes]
+        return values
+
+def _block_rows(rows: int, block_bytes: int) -> int:
+    return max(1, block_bytes // max(1, rows * np.dtype(np.float64).itemsize * _ARRAYS_PER_BLOCK))
+
+def _history(data: Union[pd.DataFrame, ValuationSeries]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if isinstance(data, ValuationSeries):
+        return data.dates, data.valuations.astype(np.float64), data.cash_flows.astype(np.float64)
+    return (np.asarray(_valuation_dates(data), dtype="datetime64[ns]"), data["total_valuation"].to_numpy(dtype=np.float64),
+            data["cash_flow"].to_numpy(dtype=np.float64))
+
+def iter_scenario_blocks(data: Union[pd.DataFrame, ValuationSeries], cash_flows: Optional[Alternatives] = None,
+                         valuations: Optional[Alternatives] = None,
+                         block_bytes: int = DEFAULT_BLOCK_BYTES) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yield the TWR paths of every scenario, a block of scenarios at a time.
+
+    Args:
+        - data (pandas.DataFrame or ValuationSeries) - the base history, sorted by date, as parse_data returns it.
+        - cash_flows, valuations - the alternatives for each field: an (S, N) array-like, or a list of S mappings from
+          valuation date (datetimes, or dd/mm/YYYY strings as in the CSV input) to replacement value. A field left as None keeps the base
+          values in every scenario. If both are given they must describe the same number of scenarios.
+        - block_bytes (int) - approximate memory budget per block. Large S is split into blocks of scenarios that fit.
+
+    Yields:
+        - (first, twr) where twr is a float64 array of shape (B, N) holding the TWR paths of scenarios first to
+          first + B - 1. Row i matches calculate_total_time_weighted_return on the base history with scenario i's
+          replacements applied.
+    """
+    return _scenario_blocks(_history(data), cash_flows, valuations, block_bytes)
+
+def _scenario_blocks(history: tuple[np.ndarray, np.ndarray, np.ndarray], cash_flows: Optional[Alternatives],
+                     valuations: Optional[Alternatives], block_bytes: int) -> Iterator[tuple[int, np.ndarray]]:
+    """Check the alternatives up front, then return a generator over the blocks."""
+    dates, base_valuations, base_cash_flows = history
+    cash_flows = _Alternatives(base_cash_flows, dates, cash_flows, "cash_flows")
+    valuations = _Alternatives(base_valuations, dates, valuations, "valuations")
+    counts = {alternatives.count for alternatives in (cash_flows, valuations)} - {None}
+    if not counts:
+        raise ValueError("Give alternative cash_flows and/or valuations to build scenarios from")
+    if len(counts) > 1:
+        raise ValueError(f"cash_flows has {cash_flows.count} scenarios but valuations has {valuations.count}")
+    return _iter_blocks(cash_flows, valuations, counts.pop(), _block_rows(len(dates), block_bytes))
+
+def _iter_blocks(cash_flows: _Alternatives, valuations: _Alternatives, scenarios: int, step: int) -> Iterator[tuple[int, np.ndarray]]:
+    for start in range(0, scenarios, step):
+        stop = min(start + step, scenarios)
+        factors = sub_period_factors(valuations.block(start, stop), cash_flows.block(start, stop))
+        twr_values = np.cumprod(factors, axis=1) - 1
+        if twr_values.shape[1]:
+            twr_values[:, 0] = 0.0 # first row is 0 as a convention
+        yield start, twr_values
+
+def calculate_scenario_time_weighted_returns(data: Union[pd.DataFrame, ValuationSeries],
+                                             cash_flows: Optional[Alternatives] = None,
+                                             valuations: Optional[Alternatives] = None,
+                                             block_bytes: int = DEFAULT_BLOCK_BYTES) -> pd.DataFrame:
+    """
+    Returns the total time weighted return of every scenario over one base history.
+
+    Args: as iter_scenario_blocks.
+
+    Returns:
+        - a pandas.DataFrame indexed by valuation date with one column per scenario (0 to S - 1). Column i equals
+          calculate_total_time_weighted_return on the base history with scenario i's replacements applied.
+
+    The result holds all S paths; to keep only part of each block (e.g. the final TWR of each scenario) use
+    iter_scenario_blocks directly, so memory stays bounded by block_bytes.
+    """
+    history = _history(data)
+    dates = history[0]
+    with stage("twr_scenarios", rows=len(dates)):
+        blocks = [twr_values for _, twr_values in _scenario_blocks(history, cash_flows, valuations, block_bytes)]
+        twr_values = np.concatenate(blocks) if blocks else np.empty((0, len(dates)))
+    return pd.DataFrame(twr_values.T, index=pd.DatetimeIndex(dates, name="valuation_date"),
+                        columns=pd.RangeIndex(len(twr_values), name="scenario"))
@@ -0,0 +1,126 @@
+"""
+Long-running TWR service that keeps the interpreter and pandas warm.
+
+- run_job: compute one JSON job (a file path or inline rows) and return a JSON-serialisable response
+- serve_stdio / serve_socket: asyncio servers reading one JSON job per line and writing one JSON response per line
+
+Jobs are handled concurrently: each one is offloaded to a process pool, and responses are written as soon as they
+complete, so they may come back out of order. Every response echoes the job's "id" to correlate them. At most one job
+per worker is in flight at a time; the next line is read once a job finishes.
+
+Job format:
+    {"id": 1, "input_file": "path/to/valuations.csv"}
+    {"id": 2, "rows": [{"valuation_date": "01/01/2025", "total_valuation": 1000, "cash_flow": 0}, ...]}
+
+Response format:
+    {"id": 1, "ok": true, "index": [...], "time_weighted_return": [...]}
+    {"id": 2, "ok": false, "error": "Invalid date format in 'valuation_date'. Expected format: %d/%m/%Y"}
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from q1.utils import parse_data
+    from q1.twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns
+except ImportError: # running as a script from inside q1/
+    from utils import parse_data
+    from twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns
+
+def _frame_from_rows(rows: list[dict]) -> pd.DataFrame:
+    """Validate inline rows exactly as parse_data validates a file, by handing it the rows as in-memory CSV text."""
+    if not rows:
+        raise ValueError("The job has no rows")
+    return parse_data(io.StringIO(pd.DataFrame(rows).to_csv(index=False)))
+
+def _json_value(value):
+    """Convert NumPy scalars (e.g. integer portfolio ids) to the Python types json can serialise."""
+    return value.item() if isinstance(value, np.generic) else value
+
+def run_job(job: dict) -> dict:
+    """Worker task: compute one job, returning errors in the response rather than raising."""
+    job_id = job.get("id") if isinstance(job, dict) else None
+    try:
+        if not isinstance(job, dict) or ("input_file" in job) == ("rows" in job):
+            raise ValueError("A job needs exactly one of 'input_file' or 'rows'")
+        df = parse_data(job["input_file"]) if "input_file" in job else _frame_from_rows(job["rows"])
+
+        if "portfolio_id" in df.columns:
+            twr_series = calculate_portfolio_time_weighted_returns(df)
+            index = [[_json_value(portfolio_id), date.strftime("%Y-%m-%d")] for portfolio_id, date in twr_series.index]
+        else:
+            twr_series = calculate_total_time_weighted_return(df)
+            index = [date.strftime("%Y-%m-%d") for date in twr_series.index]
+        return {"id": job_id, "ok": True, "index": index, "time_weighted_return": twr_series.tolist()}
+    except Exception as e:
+        return {"id": job_id, "ok": False, "error": str(e)}
+
+def _warm_worker() -> None:
+    """Pool initializer: make each worker pay its import cost once, before the first job arrives."""
+    pd.DataFrame({"x": [1.0]}).sum()
+
+async def _handle_line(line: bytes, pool: Executor, respond) -> None:
+    try:
+        job = json.loads(line)
+    except json.JSONDecodeError as e:
+        await respond({"id": None, "ok": False, "error": f"Invalid JSON job: {e}"})
+        return
+    response = await asyncio.get_running_loop().run_in_executor(pool, run_job, job)
+    await respond(response)
+
+async def _serve_lines(reader: asyncio.StreamReader, respond, pool: Executor, workers: Optional[int] = None) -> None:
+    """
+    Start a task per job line and wait for all of them once the input ends.
+
+    At most one job per worker (default: number of CPUs) is in flight; further lines are not read until one finishes,
+    so a fast client cannot queue unbounded work, and finished tasks are dropped as they complete.
+    """
+    slots = asyncio.Semaphore(workers or os.cpu_count() or 1)
+    tasks = set()
+    while line := await reader.readline():
+        if line.strip():
+            await slots.acquire()
+            task = asyncio.create_task(_handle_line(line, pool, respond))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+    if tasks:
+        await asyncio.gather(*tasks)
+
+async def serve_stdio(workers: Optional[int] = None) -> None:
+    """Serve JSON-lines jobs from stdin, writing JSON-lines responses to stdout, until stdin closes."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    async def respond(response: dict) -> None:
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+        await _serve_lines(reader, respond, pool, workers)
+
+async def serve_socket(path: str, workers: Optional[int] = None) -> None:
+    """Serve JSON-lines jobs on a Unix domain socket at path, one response line per job on the same connection."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker) as pool:
+
+        async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            async def respond(response: dict) -> None:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+            try:
+                await _serve_lines(reader, respond, pool, workers)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(handle_connection, path=path)
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pytest
+
+from q1.batch import expand_inputs, run_batch
+
+def write_file(directory: str, name: str, contents: str) -> str:
+    """Helper function to write a CSV into a temporary directory"""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(contents)
+    return path
+
+class TestExpandInputs:
+
+    def test_directory_expands_to_sorted_csv_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_file(tmp_dir, "b.csv", "")
+            write_file(tmp_dir, "a.csv", "")
+            write_file(tmp_dir, "notes.txt", "")
+            result = expand_inputs(tmp_dir)
+        assert [os.path.basename(path) for path in result] == ["a.csv", "b.csv"]
+
+    def test_no_matches_raises_error(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with pytest.raises(FileNotFoundError, match="No valuation files found"):
+                expand_inputs(os.path.join(tmp_dir, "*.csv"))
+
+class TestRunBatch:
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_errors_are_collected_per_file(self, workers):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            good = write_file(tmp_dir, "good.csv", "valuation_date,total_valuation,cash_flow\n01/01/2025,1000,0\n02/01/2025,1100,0")
+            bad = write_file(tmp_dir, "bad.csv", "valuation_date,total_valuation,cash_flow\n01-01-2025,0,1000")
+            other = write_file(tmp_dir, "other.csv", "valuation_date,total_valuation,cash_flow\n01/01/2025,1000,0\n02/01/2025,900,0")
+
+            result, errors = run_batch([good, bad, other], workers=workers, chunksize=1)
+
+        assert list(errors) == [bad]
+        assert "Invalid date format" in errors[bad]
+        assert result.index.names[0] == "source_file"
+        assert result.loc[good].tolist() == pytest.approx([0.0, 0.1], rel=1e-9)
+        assert result.loc[other].tolist() == pytest.approx([0.0, -0.1], rel=1e-9)
+
+    def test_single_and_long_format_files_combine(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            single = write_file(tmp_dir, "single.csv", "valuation_date,total_valuation,cash_flow\n01/01/2025,1000,0\n02/01/2025,1100,0")
+            long = write_file(tmp_dir, "long.csv", "portfolio_id,valuation_date,total_valuation,cash_flow\n"
+                                                   "A,01/01/2025,100,0\nA,02/01/2025,120,0\nB,01/01/2025,50,0\nB,02/01/2025,40,0")
+            result, errors = run_batch([single, long], workers=1)
+        assert errors == {}
+        assert result.index.names == ["source_file", "portfolio_id", "valuation_date"]
+        assert result.loc[(single, "")].tolist() == pytest.approx([0.0, 0.1], rel=1e-9)
+        assert result.loc[(long, "A")].tolist() == pytest.approx([0.0, 0.2], rel=1e-9)
+        assert result.loc[(long, "B")].tolist() == pytest.approx([0.0, -0.2], rel=1e-9)
+
+    def test_all_files_failing_returns_empty_series(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bad = write_file(tmp_dir, "bad.csv", "")
+            result, errors = run_batch([bad], workers=1)
+        assert result.empty
+        assert "completely empty" in errors[bad]
@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import pytest
+
+from q1.cache import parse_data_cached, evict
+from q1.utils import parse_data
+from q1.twr import calculate_total_time_weighted_return
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+def test_cache_hit_matches_parse_data():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        first = parse_data_cached(SAMPLE, cache_dir) # miss: parses and writes the entry
+        second = parse_data_cached(SAMPLE, cache_dir) # hit: memory-maps the entry
+        expected = parse_data(SAMPLE)
+        assert len(os.listdir(cache_dir)) == 1
+    for cached in (first, second):
+        assert cached["valuation_date"].tolist() == expected["valuation_date"].tolist()
+        assert calculate_total_time_weighted_return(cached).tolist() == calculate_total_time_weighted_return(expected).tolist()
+
+def test_changed_file_invalidates_entry():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, "cache")
+        csv_path = os.path.join(tmp_dir, "valuations.csv")
+        with open(csv_path, "w") as f:
+            f.write("valuation_date,total_valuation,cash_flow\n01/01/2025,1000,0\n02/01/2025,1100,0")
+        parse_data_cached(csv_path, cache_dir)
+        entries_before = os.listdir(cache_dir)
+
+        with open(csv_path, "w") as f:
+            f.write("valuation_date,total_valuation,cash_flow\n01/01/2025,1000,0\n02/01/2025,900,0")
+        result = parse_data_cached(csv_path, cache_dir)
+
+        assert result["total_valuation"].tolist() == [1000.0, 900.0]
+        entries_after = os.listdir(cache_dir)
+        assert len(entries_after) == 1 and entries_after != entries_before
+
+def test_eviction_keeps_cache_within_size_bound():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_dir = os.path.join(tmp_dir, "cache")
+        for i in range(3):
+            csv_path = os.path.join(tmp_dir, f"valuations_{i}.csv")
+            with open(csv_path, "w") as f:
+                f.write(f"valuation_date,total_valuation,cash_flow\n01/01/2025,{1000 + i},0")
+            parse_data_cached(csv_path, cache_dir, max_bytes=1) # only the newest entry survives
+        assert len(os.listdir(cache_dir)) == 1
+        assert evict(cache_dir, max_bytes=1) != [] # without a kept entry the last one goes too
+
+def test_missing_file_raises_error():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        with pytest.raises(FileNotFoundError, match="File not found"):
+            parse_data_cached("non_existent_file.csv", cache_dir)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from q1.incremental import TWRCheckpoint, calculate_incremental_time_weighted_return, load_checkpoint, save_checkpoint
+from q1.twr import calculate_total_time_weighted_return
+
+def random_history(size: int) -> pd.DataFrame:
+    """Helper function to create a random valuation history with parsed dates and some zero valuations"""
+    np.random.seed(5)
+    valuations = np.round(1000 + np.cumsum(np.random.randn(size) * 10), 2)
+    valuations[[0, size // 2]] = 0
+    return pd.DataFrame({
+        "valuation_date": pd.date_range("2025-01-01", periods=size, freq="D"),
+        "total_valuation": valuations,
+        "cash_flow": np.random.choice([0.0, 50.0, -50.0], size=size),
+    })
+
+def test_daily_updates_are_bit_identical_to_full_recompute():
+    data = random_history(60)
+    full = calculate_total_time_weighted_return(data)
+
+    result, checkpoint = calculate_incremental_time_weighted_return(data.iloc[:40])
+    pieces = [result]
+    for i in range(40, 60): # one new row per "day"
+        result, checkpoint = calculate_incremental_time_weighted_return(data.iloc[i:i + 1], checkpoint)
+        pieces.append(result)
+
+    assert pd.concat(pieces).tolist() == full.tolist()
+    assert checkpoint.last_date == data["valuation_date"].iloc[-1]
+    assert checkpoint.running_factor == full.iloc[-1] + 1
+
+def test_checkpoint_round_trips_through_json_exactly():
+    checkpoint = TWRCheckpoint(pd.Timestamp("2025-03-01"), 1234.56, 1.0 / 3.0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "checkpoint.json")
+        save_checkpoint(checkpoint, path)
+        assert load_checkpoint(path) == checkpoint
+
+def test_rows_not_after_checkpoint_raise_value_error():
+    data = random_history(5)
+    _, checkpoint = calculate_incremental_time_weighted_return(data)
+    with pytest.raises(ValueError, match="dated after the checkpoint"):
+        calculate_incremental_time_weighted_return(data.iloc[-1:], checkpoint)
+
+def test_invalid_checkpoint_file_raises_value_error():
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as tmp:
+        tmp.write("{\"last_date\": \"2025-01-01\"}")
+        tmp_path = tmp.name
+    try:
+        with pytest.raises(ValueError, match="Invalid checkpoint file"):
+            load_checkpoint(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+def test_long_format_data_raises_value_error():
+    data = random_history(4).assign(portfolio_id=["A", "A", "B", "B"])
+    with pytest.raises(ValueError, match="single portfolio"):
+        calculate_incremental_time_weighted_return(data)
@@ -0,0 +1,89 @@
+import os
+import tempfile
+
+import pytest
+
+from q1 import instrumentation
+from q1.instrumentation import attempt, collect, stage, format_summary
+from q1.utils import parse_data
+from q1.twr import calculate_total_time_weighted_return
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+def test_pipeline_stages_are_recorded_in_order():
+    with collect() as records:
+        df = parse_data(SAMPLE)
+        calculate_total_time_weighted_return(df)
+    assert [record.stage for record in records] == ["read_csv", "validate", "sort", "twr"]
+    assert all(record.rows == 64 and record.seconds >= 0 for record in records)
+    assert all(record.peak_memory_bytes is None for record in records)
+
+def test_hook_receives_structured_records_with_memory():
+    received = []
+    with collect(hook=lambda record: received.append(record.to_dict()), track_memory=True):
+        parse_data(SAMPLE, fast=True)
+    assert [record["stage"] for record in received] == ["read_csv", "validate", "sort"]
+    assert all(record["peak_memory_bytes"] >= 0 and record["rows_per_sec"] > 0 for record in received)
+
+def test_disabled_instrumentation_uses_shared_no_op_stage():
+    assert stage("twr") is stage("read_csv")
+    with stage("twr") as s:
+        s.rows = 10 # harmless while disabled
+    assert instrumentation._active is None
+
+def test_failed_stage_is_not_recorded():
+    with collect() as records:
+        with pytest.raises(FileNotFoundError):
+            parse_data("non_existent_file.csv")
+    assert records == []
+
+def test_nested_collection_raises_runtime_error():
+    with collect():
+        with pytest.raises(RuntimeError, match="already being collected"):
+            with collect():
+                pass
+
+def test_summary_lists_every_stage_and_total():
+    with collect() as records:
+        calculate_total_time_weighted_return(parse_data(SAMPLE))
+    summary = format_summary(records)
+    assert summary.splitlines()[-1].startswith("total")
+    assert "twr" in summary
+
+def test_nested_stage_keeps_the_outer_peak():
+    with collect(track_memory=True) as records:
+        with stage("outer"):
+            block = bytearray(20_000_000)
+            del block
+            with stage("inner"): # resets the process-wide peak, which must not hide the outer block
+                small = bytearray(1_000_000)
+                del small
+    peaks = {record.stage: record.peak_memory_bytes for record in records}
+    assert peaks["outer"] >= 20_000_000
+    assert 1_000_000 <= peaks["inner"] < 20_000_000
+
+def test_abandoned_attempt_leaves_no_records():
+    received = []
+    with collect(hook=received.append) as records:
+        with pytest.raises(ValueError):
+            with attempt():
+                with stage("read_csv"):
+                    pass
+                raise ValueError("fall back")
+        with attempt():
+            with stage("twr"):
+                assert received == [] # hooks wait for the attempt to complete
+    assert [record.stage for record in records] == ["twr"]
+    assert received == records
+
+def test_fast_path_fallback_records_each_stage_once():
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+        tmp.write("valuation_date,total_valuation,cash_flow\n02/01/2025,1100,0\n01/01/2025,,0\n")
+        tmp_path = tmp.name
+    try:
+        with collect(track_memory=True) as records:
+            with pytest.raises(ValueError):
+                parse_data(tmp_path, fast=True)
+    finally:
+        os.remove(tmp_path)
+    assert [record.stage for record in records] == ["read_csv"] # the reference path fails in validate
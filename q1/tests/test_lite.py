@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+import pytest
+
+from q1.lite import lite_time_weighted_return
+from q1.utils import parse_data
+from q1.twr import calculate_total_time_weighted_return
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+def test_lite_path_matches_pandas_path_exactly():
+    expected = calculate_total_time_weighted_return(parse_data(SAMPLE))
+    result = lite_time_weighted_return(SAMPLE)
+    assert [date for date, _ in result] == expected.index.strftime("%Y-%m-%d").tolist()
+    assert [value for _, value in result] == expected.tolist()
+
+def test_lite_path_sorts_by_date():
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+        tmp.write("valuation_date,total_valuation,cash_flow\n02/01/2025,1100,0\n01/01/2025,1000,0")
+        tmp_path = tmp.name
+    try:
+        result = lite_time_weighted_return(tmp_path)
+    finally:
+        os.remove(tmp_path)
+    assert [date for date, _ in result] == ["2025-01-01", "2025-01-02"]
+    assert [value for _, value in result] == pytest.approx([0.0, 0.1], rel=1e-9)
+
+@pytest.mark.parametrize("contents", [
+    "",
+    "valuation_date,total_valuation,cash_flow\n",
+    "total_valuation,cash_flow\n0,0",
+    "valuation_date,total_valuation,cash_flow\n01/01/2025,,1000",
+    "valuation_date,total_valuation,cash_flow\n01-01-2025,0,1000",
+    "valuation_date,total_valuation,cash_flow\n01/01/2025,1_000,0",
+    "valuation_date,total_valuation,cash_flow\n01/01/2025,1e3,0",
+    "valuation_date,total_valuation,cash_flow\n01/01/2025,1000.1234567890123456,0",
+    "valuation_date,total_valuation,cash_flow\n01/01/2025,0.12345678901234567,0",
+    "portfolio_id,valuation_date,total_valuation,cash_flow\na,01/01/2025,0,0",
+])
+def test_files_needing_full_path_return_none(contents):
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+        tmp.write(contents)
+        tmp_path = tmp.name
+    try:
+        assert lite_time_weighted_return(tmp_path) is None
+    finally:
+        os.remove(tmp_path)
+
+def test_missing_file_returns_none():
+    assert lite_time_weighted_return("non_existent_file.csv") is None
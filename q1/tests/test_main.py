@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+from q1.main import parse_args
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+TEST_DATA = os.path.join(os.path.dirname(__file__), "..", "test_data")
+
+def parse(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["main.py", *argv])
+    return parse_args()
+
+@pytest.mark.parametrize("argv", [
+    [SAMPLE],
+    [SAMPLE, "--rolling", "30"],
+    [SAMPLE, "--checkpoint", "state.json", "--output", "out.csv"],
+    [TEST_DATA, "--workers", "2"],
+    ["--serve", "--workers", "2"],
+])
+def test_compatible_flags_are_accepted(monkeypatch, argv):
+    parse(monkeypatch, *argv)
+
+@pytest.mark.parametrize("argv, message", [
+    ([TEST_DATA, "--checkpoint", "state.json"], "--checkpoint cannot be combined with a directory/glob input"),
+    ([TEST_DATA, "--stream"], "--stream cannot be combined with a directory/glob input"),
+    ([TEST_DATA, "--cache-dir", "cache"], "--cache-dir cannot be combined with a directory/glob input"),
+    ([SAMPLE, "--stream", "--rolling", "30"], "--rolling cannot be combined with --stream"),
+    ([SAMPLE, "--stream", "--periods", "M"], "--periods cannot be combined with --stream"),
+    ([SAMPLE, "--checkpoint", "state.json", "--cache-dir", "cache"], "--cache-dir cannot be combined with --checkpoint"),
+    ([SAMPLE, "--rolling", "30", "--periods", "M"], "--periods cannot be combined with --rolling"),
+    ([TEST_DATA, "--merge", "--periods", "Q"], "--periods cannot be combined with --merge"),
+])
+def test_flags_the_mode_would_ignore_are_rejected(monkeypatch, capsys, argv, message):
+    with pytest.raises(SystemExit):
+        parse(monkeypatch, *argv)
+    assert message in capsys.readouterr().err
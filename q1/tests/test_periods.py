@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from q1.periods import (annualise_return, annualised_time_weighted_return, period_time_weighted_returns,
+                        rolling_time_weighted_return)
+from q1.twr import calculate_total_time_weighted_return
+
+def random_history(size: int) -> pd.DataFrame:
+    """Helper function to create a random business-day valuation history with a zero valuation"""
+    np.random.seed(8)
+    valuations = np.round(1000 + np.cumsum(np.random.randn(size) * 10), 2)
+    valuations[[0, 70]] = 0
+    return pd.DataFrame({
+        "valuation_date": pd.bdate_range("2024-11-01", periods=size),
+        "total_valuation": valuations,
+        "cash_flow": np.random.choice([0.0, 50.0, -50.0], size=size),
+    })
+
+def test_rolling_window_matches_sliced_recompute():
+    data = random_history(200)
+    result = rolling_time_weighted_return(data, 30)
+    dates = data["valuation_date"]
+    for t in dates.iloc[::7]:
+        start = t - pd.Timedelta(days=30)
+        if start < dates.iloc[0]:
+            assert np.isnan(result[t])
+            continue
+        base = dates[dates <= start].iloc[-1] # last valuation on or before the window start
+        expected = calculate_total_time_weighted_return(data[(dates >= base) & (dates <= t)]).iloc[-1]
+        assert result[t] == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+def test_rolling_window_without_valuation_on_its_start_uses_earlier_base():
+    data = pd.DataFrame({
+        "valuation_date": pd.to_datetime(["2025-01-01", "2025-01-10", "2025-02-05"]),
+        "total_valuation": [100.0, 110.0, 121.0],
+        "cash_flow": [0.0, 0.0, 0.0],
+    })
+    result = rolling_time_weighted_return(data, 30, annualise=True)
+    # no valuation on 2025-01-06, so the base is 2025-01-01 and the window spans 35 days
+    assert np.isnan(result.iloc[:2]).all()
+    assert result.iloc[2] == pytest.approx(annualise_return(0.21, 35), rel=1e-12)
+
+def test_long_format_data_raises_value_error():
+    data = random_history(100).assign(portfolio_id="A")
+    with pytest.raises(ValueError, match="single portfolio"):
+        rolling_time_weighted_return(data, 5)
+    with pytest.raises(ValueError, match="single portfolio"):
+        period_time_weighted_returns(data, "M")
+
+def test_monthly_returns_compound_to_total_return():
+    data = random_history(200)
+    result = period_time_weighted_returns(data, "M")
+    total = calculate_total_time_weighted_return(data).iloc[-1]
+    assert len(result) == data["valuation_date"].dt.to_period("M").nunique()
+    assert np.prod(result + 1) - 1 == pytest.approx(total, rel=1e-9)
+
+def test_yearly_return_of_single_year_is_its_total_return():
+    data = pd.DataFrame({
+        "valuation_date": pd.to_datetime(["31/12/2024", "31/03/2025", "31/12/2025"], format="%d/%m/%Y"),
+        "total_valuation" : [1000, 1100, 1210],
+        "cash_flow": [0, 0, 0]
+    })
+    result = period_time_weighted_returns(data, "Y")
+    assert result.tolist() == pytest.approx([0.0, 0.21], rel=1e-9)
+
+def test_unknown_frequency_raises_value_error():
+    with pytest.raises(ValueError, match="Unknown period frequency"):
+        period_time_weighted_returns(random_history(80), "W")
+
+def test_annualised_return_of_two_years_doubles_once():
+    data = pd.DataFrame({
+        "valuation_date": pd.to_datetime(["01/01/2025", "01/01/2027"], format="%d/%m/%Y"),
+        "total_valuation" : [1000, 1210],
+        "cash_flow": [0, 0]
+    })
+    days = 730
+    assert annualised_time_weighted_return(data) == pytest.approx(1.21 ** (365.25 / days) - 1, rel=1e-12)
+    assert annualise_return(0.1, 365.25) == pytest.approx(0.1, rel=1e-12)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from q1.range_index import TWRRangeIndex
+from q1.twr import calculate_total_time_weighted_return
+
+def random_history(size: int) -> pd.DataFrame:
+    """Helper function to create a random valuation history with zero valuations and a total loss"""
+    np.random.seed(21)
+    valuations = np.round(1000 + np.cumsum(np.random.randn(size) * 10), 2)
+    valuations[[0, 30, 31]] = 0
+    cash_flows = np.random.choice([0.0, 50.0, -50.0], size=size)
+    cash_flows[[30, 31]] = 0 # valuation drops to 0 with no cash flow: a zero sub-period factor
+    return pd.DataFrame({
+        "valuation_date": pd.bdate_range("2025-01-01", periods=size),
+        "total_valuation": valuations,
+        "cash_flow": cash_flows,
+    })
+
+def sliced_twr(data: pd.DataFrame, start, end) -> float:
+    """The existing approach: re-run the calculation on the rows inside the range."""
+    dates = data["valuation_date"]
+    sliced = data[(dates >= start) & (dates <= end)]
+    return calculate_total_time_weighted_return(sliced).iloc[-1]
+
+def test_range_queries_match_sliced_recompute():
+    data = random_history(120)
+    index = TWRRangeIndex.from_frame(data)
+    np.random.seed(1)
+    calendar = pd.date_range("2024-12-25", "2025-06-30", freq="D") # includes weekends and dates outside the history
+    for _ in range(200):
+        start, end = sorted(np.random.choice(calendar, size=2))
+        expected = sliced_twr(data, start, end) if ((data["valuation_date"] >= start) & (data["valuation_date"] <= end)).any() else np.nan
+        assert index.twr(start, end) == pytest.approx(expected, rel=1e-9, abs=1e-12, nan_ok=True)
+
+def test_batch_queries_are_vectorized():
+    data = random_history(120)
+    index = TWRRangeIndex.from_frame(data)
+    starts = ["2025-01-01", "2025-03-01", "2025-04-01"]
+    ends = ["2025-06-30", "2025-03-31", "2025-04-30"]
+    result = index.twr_many(starts, ends)
+    assert result.tolist() == pytest.approx([index.twr(s, e) for s, e in zip(starts, ends)])
+
+def test_range_containing_total_loss_returns_minus_one():
+    data = random_history(120)
+    index = TWRRangeIndex.from_frame(data)
+    loss_date = data["valuation_date"].iloc[30]
+    assert index.twr(data["valuation_date"].iloc[20], loss_date) == -1.0
+
+def test_end_before_start_raises_value_error():
+    index = TWRRangeIndex.from_frame(random_history(40))
+    with pytest.raises(ValueError, match="end on or after"):
+        index.twr("2025-02-01", "2025-01-01")
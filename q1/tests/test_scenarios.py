@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from q1.scenarios import calculate_scenario_time_weighted_returns, iter_scenario_blocks
+from q1.twr import calculate_total_time_weighted_return
+from q1.utils import parse_data
+from q1.valuation_series import ValuationSeries
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+def recompute(df, cash_flows=None, valuations=None):
+    """The per-scenario path: copy the frame, replace the column and recompute."""
+    df = df.copy()
+    if cash_flows is not None:
+        df["cash_flow"] = cash_flows
+    if valuations is not None:
+        df["total_valuation"] = valuations
+    return calculate_total_time_weighted_return(df).to_numpy()
+
+def test_dense_scenarios_match_recompute():
+    df = parse_data(SAMPLE)
+    rng = np.random.default_rng(0)
+    cash_flows = rng.normal(0, 50, size=(6, len(df)))
+    valuations = df["total_valuation"].to_numpy() + rng.normal(0, 5, size=(6, len(df)))
+    valuations[:, 3] = 0.0 # every scenario has a zero valuation, which must give a factor of 1.0 after it
+    result = calculate_scenario_time_weighted_returns(df, cash_flows=cash_flows, valuations=valuations)
+    assert result.shape == (len(df), 6)
+    assert (result.index == df["valuation_date"]).all()
+    for i in range(6):
+        np.testing.assert_array_equal(result[i].to_numpy(), recompute(df, cash_flows[i], valuations[i]))
+
+def test_sparse_scenarios_match_recompute():
+    df = parse_data(SAMPLE)
+    dates = df["valuation_date"]
+    scenarios = [{dates[10]: 1000.0}, {}, {dates[20]: -250.0, dates[40]: 75.5}, {"13/11/2017": 10.0}]
+    result = calculate_scenario_time_weighted_returns(df, cash_flows=scenarios)
+    for i, changes in enumerate(scenarios):
+        cash_flows = df["cash_flow"].to_numpy(dtype=np.float64).copy()
+        for date, value in changes.items():
+            cash_flows[(dates == pd.Timestamp(date)).to_numpy()] = value
+        np.testing.assert_array_equal(result[i].to_numpy(), recompute(df, cash_flows))
+    np.testing.assert_array_equal(result[1].to_numpy(), calculate_total_time_weighted_return(df).to_numpy())
+
+def test_dense_and_sparse_fields_combine():
+    df = parse_data(SAMPLE)
+    valuations = np.tile(df["total_valuation"].to_numpy(dtype=np.float64), (2, 1)) * [[1.0], [1.1]]
+    cash_flows = [{df["valuation_date"][5]: 20.0}, {}]
+    result = calculate_scenario_time_weighted_returns(ValuationSeries.from_frame(df), cash_flows, valuations)
+    expected_flows = df["cash_flow"].to_numpy(dtype=np.float64).copy()
+    expected_flows[5] = 20.0
+    np.testing.assert_array_equal(result[0].to_numpy(), recompute(df, expected_flows, valuations[0]))
+    np.testing.assert_array_equal(result[1].to_numpy(), recompute(df, None, valuations[1]))
+
+def test_blocks_respect_the_memory_budget():
+    df = parse_data(SAMPLE)
+    cash_flows = np.random.default_rng(1).normal(size=(25, len(df)))
+    block_bytes = 4 * 8 * len(df) * 4 # room for four scenarios per block
+    blocks = list(iter_scenario_blocks(df, cash_flows=cash_flows, block_bytes=block_bytes))
+    assert [first for first, _ in blocks] == list(range(0, 25, 4))
+    assert all(len(twr_values) <= 4 for _, twr_values in blocks)
+    whole = calculate_scenario_time_weighted_returns(df, cash_flows=cash_flows)
+    np.testing.assert_array_equal(np.concatenate([twr_values for _, twr_values in blocks]), whole.to_numpy().T)
+
+def test_unknown_date_raises():
+    df = parse_data(SAMPLE)
+    with pytest.raises(ValueError, match="No valuation on 01/01/1990 to replace in cash_flows of scenario 1"):
+        calculate_scenario_time_weighted_returns(df, cash_flows=[{}, {"01/01/1990": 5.0}])
+
+def test_mismatched_inputs_raise():
+    df = parse_data(SAMPLE)
+    with pytest.raises(ValueError, match="shape"):
+        iter_scenario_blocks(df, cash_flows=np.zeros((2, len(df) + 1)))
+    with pytest.raises(ValueError, match="scenarios but valuations has"):
+        iter_scenario_blocks(df, cash_flows=np.zeros((2, len(df))), valuations=np.ones((3, len(df))))
+    with pytest.raises(ValueError, match="Give alternative"):
+        iter_scenario_blocks(df)
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from q1.service import run_job, _serve_lines
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+def test_file_job_returns_twr_points():
+    response = run_job({"id": 7, "input_file": SAMPLE})
+    assert response["id"] == 7 and response["ok"]
+    assert len(response["index"]) == len(response["time_weighted_return"]) == 64
+
+def test_inline_rows_job_returns_twr_points():
+    response = run_job({"id": "a", "rows": [
+        {"valuation_date": "02/01/2025", "total_valuation": 1100, "cash_flow": 0},
+        {"valuation_date": "01/01/2025", "total_valuation": 1000, "cash_flow": 0},
+    ]})
+    assert response["index"] == ["2025-01-01", "2025-01-02"]
+    assert response["time_weighted_return"] == pytest.approx([0.0, 0.1], rel=1e-9)
+
+def test_invalid_rows_report_parse_data_error():
+    response = run_job({"id": 1, "rows": [{"valuation_date": "01-01-2025", "total_valuation": 0, "cash_flow": 0}]})
+    assert not response["ok"]
+    assert "Invalid date format" in response["error"]
+
+def test_job_without_input_reports_error():
+    response = run_job({"id": 1})
+    assert not response["ok"] and "exactly one of" in response["error"]
+
+def test_served_lines_each_get_one_response():
+    async def serve(lines: list[str]) -> list[dict]:
+        reader = asyncio.StreamReader()
+        reader.feed_data("".join(line + "\n" for line in lines).encode())
+        reader.feed_eof()
+        responses = []
+
+        async def respond(response: dict) -> None:
+            responses.append(response)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            await _serve_lines(reader, respond, pool)
+        return responses
+
+    lines = [json.dumps({"id": 1, "input_file": SAMPLE}), "not json", "", json.dumps({"id": 2, "input_file": "missing.csv"})]
+    responses = asyncio.run(serve(lines))
+    assert sorted(str(response["id"]) for response in responses) == ["1", "2", "None"]
+    assert {response["id"]: response["ok"] for response in responses} == {1: True, None: False, 2: False}
+
+def test_jobs_in_flight_are_limited_to_the_worker_count():
+    async def serve(jobs: int, workers: int) -> int:
+        reader = asyncio.StreamReader()
+        reader.feed_data("".join(json.dumps({"id": i, "input_file": SAMPLE}) + "\n" for i in range(jobs)).encode())
+        reader.feed_eof()
+        in_flight = peak = 0
+
+        async def respond(response: dict) -> None:
+            nonlocal in_flight
+            in_flight -= 1
+
+        def job(job: dict) -> dict:
+            return job
+
+        class CountingPool(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                return super().submit(job, *args)
+
+        with CountingPool(max_workers=4) as pool:
+            await _serve_lines(reader, respond, pool, workers)
+        return peak
+
+    assert asyncio.run(serve(jobs=20, workers=2)) <= 2
@@ -1,7 +1,8 @@
 import pytest
+import numpy as np
 import pandas as pd
 
-from q1.twr import calculate_total_time_weighted_return
+from q1.twr import calculate_total_time_weighted_return, calculate_portfolio_time_weighted_returns, stream_time_weighted_return
 
 """
 Please note, floating point comparisons have been done with a tolerance of 1e-9. This number was chosen to reflect a tight tolerance needed in the financial indusrty.
@@ -103,3 +104,82 @@ def test_multiple_withdrawals_then_drop_returns_negative_ten_percent():
     result = calculate_total_time_weighted_return(data)
     correct_result = [0.0, 0.0, 0.0, -0.1]
     assert result.tolist() == pytest.approx(correct_result, rel=1e-9)
+
+def test_numpy_engine_matches_loop_engine_exactly():
+    np.random.seed(7)
+    n = 500
+    valuations = np.round(1000 + np.cumsum(np.random.randn(n) * 10), 2)
+    valuations[[0, 1, 100, 101, 250]] = 0 # zero valuations, including consecutive ones
+    data = pd.DataFrame({
+        "valuation_date": pd.date_range("2025-01-01", periods=n, freq="D").strftime("%d/%m/%Y"),
+        "total_valuation": valuations,
+        "cash_flow": np.random.choice([0.0, 50.0, -50.0], size=n),
+    })
+    fast = calculate_total_time_weighted_return(data, engine="numpy")
+    reference = calculate_total_time_weighted_return(data, engine="loop")
+    assert fast.tolist() == reference.tolist()
+    assert fast.index.equals(reference.index)
+
+def test_numpy_engine_accepts_parsed_datetime_column():
+    data = pd.DataFrame({
+        "valuation_date": pd.to_datetime(["01/01/2025", "02/01/2025"], format="%d/%m/%Y"),
+        "total_valuation" : [1000, 1100],
+        "cash_flow": [0, 0]
+    })
+    result = calculate_total_time_weighted_return(data)
+    assert result.index.tolist() == data["valuation_date"].tolist()
+
+def test_unknown_engine_raises_value_error():
+    data = pd.DataFrame(columns=["valuation_date", "total_valuation", "cash_flow"])
+    with pytest.raises(ValueError, match="Unknown engine"):
+        calculate_total_time_weighted_return(data, engine="fortran")
+
+def test_portfolio_returns_match_single_portfolio_calculation():
+    np.random.seed(11)
+    frames = []
+    for portfolio_id, n in [("p1", 40), ("p2", 1), ("p3", 25)]:
+        valuations = np.round(1000 + np.cumsum(np.random.randn(n) * 10), 2)
+        valuations[n // 2] = 0 # zero valuation inside each portfolio
+        frames.append(pd.DataFrame({
+            "portfolio_id": portfolio_id,
+            "valuation_date": pd.date_range("2025-01-01", periods=n, freq="D").strftime("%d/%m/%Y"),
+            "total_valuation": valuations,
+            "cash_flow": np.random.choice([0.0, 50.0, -50.0], size=n),
+        }))
+    data = pd.concat(frames, ignore_index=True)
+
+    result = calculate_portfolio_time_weighted_returns(data)
+
+    assert result.index.names == ["portfolio_id", "valuation_date"]
+    for portfolio_id, frame in zip(["p1", "p2", "p3"], frames):
+        expected = calculate_total_time_weighted_return(frame.drop(columns="portfolio_id"), engine="loop")
+        assert result.loc[portfolio_id].tolist() == expected.tolist()
+
+def test_portfolio_returns_reset_at_group_boundary():
+    data = pd.DataFrame({
+        "portfolio_id": ["a", "a", "b", "b"],
+        "valuation_date": ["01/01/2025", "02/01/2025", "01/01/2025", "02/01/2025"],
+        "total_valuation" : [0, 1000, 500, 550],
+        "cash_flow": [0, 1000, 0, 0]
+    })
+    result = calculate_portfolio_time_weighted_returns(data)
+    correct_result = [0.0, 0.0, 0.0, 0.1]
+    assert result.tolist() == pytest.approx(correct_result, rel=1e-9)
+
+def test_streamed_chunks_match_whole_history_exactly():
+    np.random.seed(3)
+    n = 103
+    valuations = np.round(1000 + np.cumsum(np.random.randn(n) * 10), 2)
+    valuations[[0, 9, 10, 50]] = 0 # zero valuations, including one at a chunk boundary
+    data = pd.DataFrame({
+        "valuation_date": pd.date_range("2025-01-01", periods=n, freq="D").strftime("%d/%m/%Y"),
+        "total_valuation": valuations,
+        "cash_flow": np.random.choice([0.0, 50.0, -50.0], size=n),
+    })
+    emitted = []
+    chunks = (data.iloc[i:i + 10] for i in range(0, n, 10))
+    rows = stream_time_weighted_return(chunks, emitted.append)
+
+    assert rows == n
+    assert len(emitted) == 11
+    assert pd.concat(emitted).tolist() == calculate_total_time_weighted_return(data, engine="loop").tolist()
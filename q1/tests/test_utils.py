@@ -3,7 +3,8 @@ import pandas as pd
 import tempfile
 import os
 
-from q1.utils import parse_data, validate_csv_filename
+from q1 import utils
+from q1.utils import parse_data, validate_csv_filename, iter_valuation_chunks, iter_merged_valuation_chunks, parse_dates, clear_date_cache
 
 class TestValidateCsvFilename:
 
@@ -117,4 +118,194 @@ class TestParseData:
         result = parse_data(tmp_path)["valuation_date"]
         correct_result = pd.to_datetime(["01/01/2025", "04/01/2025"], dayfirst=True)
         assert result.tolist() == correct_result.tolist()
-        os.remove(tmp_path)
\ No newline at end of file
+        os.remove(tmp_path)
+    def test_parse_data_sorts_long_format_by_portfolio_then_date(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+            tmp.write("portfolio_id,valuation_date,total_valuation,cash_flow\n"
+                      "b,02/01/2025,0,0\na,02/01/2025,0,0\nb,01/01/2025,0,0\na,01/01/2025,0,0")
+            tmp.flush() # ensure data is saved
+            tmp_path = tmp.name
+        result = parse_data(tmp_path)
+        os.remove(tmp_path)
+        assert result["portfolio_id"].tolist() == ["a", "a", "b", "b"]
+        correct_dates = pd.to_datetime(["01/01/2025", "02/01/2025"] * 2, dayfirst=True)
+        assert result["valuation_date"].tolist() == correct_dates.tolist()
+
+
+class TestParseDataFast:
+
+    SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+    def test_fast_path_matches_reference_path(self):
+        fast = parse_data(self.SAMPLE, fast=True)
+        reference = parse_data(self.SAMPLE)
+        assert fast["valuation_date"].tolist() == reference["valuation_date"].tolist()
+        assert fast["total_valuation"].tolist() == reference["total_valuation"].tolist()
+        assert fast["cash_flow"].tolist() == reference["cash_flow"].tolist()
+
+    def test_fast_path_sorts_out_of_order_file(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+            tmp.write("valuation_date,total_valuation,cash_flow\n04/01/2025,0,0\n01/01/2025,0,0")
+            tmp.flush() # ensure data is saved
+            tmp_path = tmp.name
+        result = parse_data(tmp_path, fast=True)["valuation_date"]
+        os.remove(tmp_path)
+        correct_result = pd.to_datetime(["01/01/2025", "04/01/2025"], dayfirst=True)
+        assert result.tolist() == correct_result.tolist()
+
+    @pytest.mark.parametrize("contents, message", [
+        ("", "completely empty"),
+        ("valuation_date,total_valuation,cash_flow\n", "column headers but no data"),
+        ("total_valuation,cash_flow\n0, 0", "Missing required columns"),
+        ("valuation_date,total_valuation,cash_flow\n01/01/2025,,1000", "Missing values"),
+        ("valuation_date,total_valuation,cash_flow\n01-01-2025,0,1000", "Invalid date format"),
+        ("valuation_date,total_valuation,cash_flow\n01/01/2025,a,1000", "Non-numeric value found in 'total_valuation'"),
+        ('valuation_date,total_valuation,cash_flow\n"01/01/2025,1000,1000', "Error parsing CSV file"),
+    ])
+    def test_fast_path_error_messages_match_reference_path(self, contents, message):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+            tmp.write(contents)
+            tmp.flush() # ensure data is saved
+            tmp_path = tmp.name
+        try:
+            with pytest.raises(ValueError, match=message):
+                parse_data(tmp_path, fast=True)
+        finally:
+            os.remove(tmp_path)
+
+    def test_unknown_engine_raises_value_error(self):
+        with pytest.raises(ValueError, match="Unknown CSV engine"):
+            parse_data(self.SAMPLE, fast=True, engine="python")
+
+class TestParseDates:
+
+    def repeated_dates(self) -> pd.Series:
+        return pd.Series(["01/01/2025", "02/01/2025", None, "01/01/2025", "31/12/2024"] * 3, name="valuation_date")
+
+    def test_matches_pandas_to_datetime(self):
+        clear_date_cache()
+        column = self.repeated_dates()
+        expected = pd.to_datetime(column, format="%d/%m/%Y")
+        pd.testing.assert_series_equal(parse_dates(column, "%d/%m/%Y"), expected)
+        # second call is served from the cache
+        pd.testing.assert_series_equal(parse_dates(column, "%d/%m/%Y"), expected)
+
+    def test_malformed_date_raises_like_pandas(self):
+        column = pd.Series(["01/01/2025", "2025-01-02", "01/01/2025"])
+        with pytest.raises(ValueError):
+            parse_dates(column, "%d/%m/%Y")
+
+    def test_cache_is_bounded(self, monkeypatch):
+        clear_date_cache()
+        monkeypatch.setattr(utils, "DATE_CACHE_MAX_ENTRIES", 3)
+        column = pd.Series(pd.date_range("2025-01-01", periods=3).strftime("%d/%m/%Y").tolist() * 2)
+        parse_dates(column, "%d/%m/%Y")
+        other = pd.Series(pd.date_range("2026-01-01", periods=2).strftime("%d/%m/%Y").tolist() * 2)
+        parse_dates(other, "%d/%m/%Y")
+        assert len(utils._date_cache) == 3
+        assert ("%d/%m/%Y", "01/01/2026") in utils._date_cache
+        clear_date_cache()
+
+class TestIterValuationChunks:
+
+    def write_csv(self, contents: str) -> str:
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+            tmp.write(contents)
+            tmp.flush() # ensure data is saved
+            return tmp.name
+
+    def test_chunks_are_validated_and_bounded_in_size(self):
+        tmp_path = self.write_csv("valuation_date,total_valuation,cash_flow\n" + "".join(f"{day:02d}/01/2025,{day},0\n" for day in range(1, 8)))
+        try:
+            chunks = list(iter_valuation_chunks(tmp_path, chunk_rows=3))
+        finally:
+            os.remove(tmp_path)
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        assert pd.api.types.is_datetime64_any_dtype(chunks[0]["valuation_date"])
+
+    def test_out_of_order_rows_across_chunks_raise_value_error(self):
+        tmp_path = self.write_csv("valuation_date,total_valuation,cash_flow\n01/01/2025,0,0\n03/01/2025,0,0\n02/01/2025,0,0")
+        try:
+            with pytest.raises(ValueError, match="row 3 is out of order"):
+                list(iter_valuation_chunks(tmp_path, chunk_rows=2))
+        finally:
+            os.remove(tmp_path)
+
+    def test_long_format_file_raises_value_error(self):
+        tmp_path = self.write_csv("portfolio_id,valuation_date,total_valuation,cash_flow\nA,01/01/2025,100,0\nB,01/01/2025,50,0")
+        try:
+            with pytest.raises(ValueError, match="single portfolio"):
+                list(iter_valuation_chunks(tmp_path, chunk_rows=10))
+        finally:
+            os.remove(tmp_path)
+
+    def test_out_of_order_rows_within_chunk_raise_value_error(self):
+        tmp_path = self.write_csv("valuation_date,total_valuation,cash_flow\n01/01/2025,0,0\n03/01/2025,0,0\n02/01/2025,0,0")
+        try:
+            with pytest.raises(ValueError, match="row 3 is out of order"):
+                list(iter_valuation_chunks(tmp_path, chunk_rows=10))
+        finally:
+            os.remove(tmp_path)
+
+    def test_header_only_csv_file_raises_specific_error(self):
+        tmp_path = self.write_csv("valuation_date,total_valuation,cash_flow\n")
+        try:
+            with pytest.raises(ValueError, match="column headers but no data"):
+                list(iter_valuation_chunks(tmp_path))
+        finally:
+            os.remove(tmp_path)
+
+    def test_invalid_chunk_raises_same_error_as_parse_data(self):
+        tmp_path = self.write_csv("valuation_date,total_valuation,cash_flow\n01/01/2025,0,0\n02/01/2025,a,0")
+        try:
+            with pytest.raises(ValueError, match="Non-numeric value found"):
+                list(iter_valuation_chunks(tmp_path, chunk_rows=1))
+        finally:
+            os.remove(tmp_path)
+
+class TestIterMergedValuationChunks:
+
+    SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+    def write_csv(self, df: pd.DataFrame) -> str:
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
+            df.to_csv(tmp, index=False)
+            return tmp.name
+
+    def split_sample(self, pieces: int) -> list[str]:
+        """Split the sample into date-sorted files with interleaved date ranges."""
+        df = parse_data(self.SAMPLE)
+        df["valuation_date"] = df["valuation_date"].dt.strftime("%d/%m/%Y")
+        return [self.write_csv(df.iloc[i::pieces]) for i in range(pieces)]
+
+    @pytest.mark.parametrize("pieces,chunk_rows", [(1, 100), (3, 2), (4, 5), (7, 1)])
+    def test_merge_matches_parse_data(self, pieces, chunk_rows):
+        paths = self.split_sample(pieces)
+        try:
+            merged = pd.concat(list(iter_merged_valuation_chunks(paths, chunk_rows=chunk_rows)), ignore_index=True)
+        finally:
+            for path in paths:
+                os.remove(path)
+        expected = parse_data(self.SAMPLE)
+        pd.testing.assert_frame_equal(merged, expected.astype({"total_valuation": "float64", "cash_flow": "float64"}))
+
+    def test_duplicate_dates_across_files_raise(self):
+        first = self.write_csv(pd.DataFrame({"valuation_date": ["01/01/2025", "03/01/2025"], "total_valuation": [1, 2], "cash_flow": [0, 0]}))
+        second = self.write_csv(pd.DataFrame({"valuation_date": ["02/01/2025", "03/01/2025"], "total_valuation": [1, 2], "cash_flow": [0, 0]}))
+        try:
+            with pytest.raises(ValueError, match="Duplicate valuation_date 03/01/2025"):
+                list(iter_merged_valuation_chunks([first, second], chunk_rows=1))
+        finally:
+            os.remove(first)
+            os.remove(second)
+
+    def test_errors_name_the_file(self):
+        good = self.write_csv(pd.DataFrame({"valuation_date": ["01/01/2025"], "total_valuation": [1], "cash_flow": [0]}))
+        bad = self.write_csv(pd.DataFrame({"valuation_date": ["02/01/2025", "01/01/2025"], "total_valuation": [1, 2], "cash_flow": [0, 0]}))
+        try:
+            with pytest.raises(ValueError, match="out of order") as excinfo:
+                list(iter_merged_valuation_chunks([good, bad]))
+        finally:
+            os.remove(good)
+            os.remove(bad)
+        assert bad in str(excinfo.value)
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from q1.valuation_series import ValuationSeries
+from q1.utils import parse_data
+from q1.twr import calculate_total_time_weighted_return
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "test_data", "sample_valuations.csv")
+
+def test_parse_data_compact_matches_frame():
+    df = parse_data(SAMPLE)
+    series = parse_data(SAMPLE, compact=True)
+    assert isinstance(series, ValuationSeries)
+    assert series.days.dtype == np.int32
+    assert series.valuations.dtype == np.float64
+    pd.testing.assert_frame_equal(series.to_frame(), df.astype({"total_valuation": "float64", "cash_flow": "float64"}))
+
+@pytest.mark.parametrize("engine", ["numpy", "loop"])
+def test_twr_from_valuation_series_matches_frame(engine):
+    df = parse_data(SAMPLE)
+    expected = calculate_total_time_weighted_return(df, engine=engine)
+    result = calculate_total_time_weighted_return(ValuationSeries.from_frame(df), engine=engine)
+    pd.testing.assert_series_equal(result, expected)
+
+def test_float32_storage_is_smaller_and_close():
+    series = parse_data(SAMPLE, compact=True)
+    small = series.astype(np.float32)
+    assert small.nbytes == len(series) * 12
+    assert series.nbytes == len(series) * 20
+    expected = calculate_total_time_weighted_return(series)
+    result = calculate_total_time_weighted_return(small)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+def test_matching_arrays_are_not_copied():
+    days = np.arange(3, dtype=np.int32)
+    valuations = np.array([100.0, 110.0, 120.0])
+    series = ValuationSeries(days, valuations, np.zeros(3))
+    assert series.days is days
+    assert series.valuations is valuations
+
+def test_mismatched_lengths_raise():
+    with pytest.raises(ValueError, match="same length"):
+        ValuationSeries([0, 1], [1.0], [0.0])
+
+def test_long_format_frame_raises():
+    df = pd.DataFrame({"portfolio_id": ["a"], "valuation_date": pd.to_datetime(["2025-01-01"]),
+                       "total_valuation": [1.0], "cash_flow": [0.0]})
+    with pytest.raises(ValueError, match="single portfolio"):
+        ValuationSeries.from_frame(df)
+
+def test_empty_series_gives_empty_twr():
+    series = ValuationSeries([], [], [])
+    assert calculate_total_time_weighted_return(series).empty
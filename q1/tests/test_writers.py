@@ -0,0 +1,96 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from q1.writers import infer_format, open_writer, write_series
+
+def single_series(size=10):
+    index = pd.date_range("2025-01-01", periods=size, freq="D")
+    return pd.Series(np.linspace(0, 0.3, size) / 7, index=index.rename("valuation_date"), name="time_weighted_return")
+
+def portfolio_series():
+    index = pd.MultiIndex.from_arrays(
+        [["a", "a", "long_portfolio_id"], pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-01"])],
+        names=["portfolio_id", "valuation_date"],
+    )
+    return pd.Series([0.0, 0.1, np.nan], index=index, name="time_weighted_return")
+
+@pytest.fixture
+def tmp_dir():
+    with tempfile.TemporaryDirectory() as path:
+        yield path
+
+@pytest.mark.parametrize("series", [single_series(), portfolio_series()])
+def test_csv_matches_pandas_to_csv(series, tmp_dir):
+    path = os.path.join(tmp_dir, "out.csv")
+    write_series(series, path, chunk_rows=2)
+    with open(path) as f:
+        assert f.read() == series.to_csv()
+
+def test_npy_round_trips_across_chunks(tmp_dir):
+    series = single_series(25)
+    path = os.path.join(tmp_dir, "out.npy")
+    write_series(series, path, chunk_rows=7)
+    records = np.load(path)
+    assert records.dtype.names == ("valuation_date", "time_weighted_return")
+    assert (records["valuation_date"] == series.index.to_numpy()).all()
+    assert (records["time_weighted_return"] == series.to_numpy()).all()
+
+def test_npy_sizes_text_columns_from_whole_series(tmp_dir):
+    series = portfolio_series()
+    path = os.path.join(tmp_dir, "out.npy")
+    write_series(series, path, chunk_rows=1)
+    records = np.load(path)
+    assert records["portfolio_id"].tolist() == ["a", "a", "long_portfolio_id"]
+    assert records["time_weighted_return"][:2].tolist() == [0.0, 0.1]
+
+def test_npy_rejects_text_wider_than_first_chunk(tmp_dir):
+    series = portfolio_series()
+    with pytest.raises(ValueError, match="longer than the width"):
+        with open_writer(os.path.join(tmp_dir, "out.npy")) as writer:
+            writer.write(series.iloc[:2])
+            writer.write(series.iloc[2:])
+
+def test_format_is_inferred_from_extension():
+    assert infer_format("out.parquet") == "parquet"
+    assert infer_format("out.NPY") == "npy"
+    assert infer_format("out.feather") == "arrow"
+    assert infer_format("out.txt") == "csv"
+
+def test_unknown_format_raises(tmp_dir):
+    with pytest.raises(ValueError, match="Unknown output format"):
+        open_writer(os.path.join(tmp_dir, "out.bin"), "hdf5")
+
+def test_parquet_round_trip(tmp_dir):
+    pytest.importorskip("pyarrow")
+    series = portfolio_series()
+    path = os.path.join(tmp_dir, "out.parquet")
+    write_series(series, path, chunk_rows=2)
+    frame = pd.read_parquet(path)
+    assert frame["portfolio_id"].tolist() == ["a", "a", "long_portfolio_id"]
+    assert frame["time_weighted_return"].iloc[:2].tolist() == [0.0, 0.1]
+
+def test_csv_quotes_text_like_pandas(tmp_dir):
+    index = pd.MultiIndex.from_arrays(
+        [["Smith, J", 'say "hi"', "plain"], pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03"])],
+        names=["portfolio_id", "valuation_date"],
+    )
+    series = pd.Series([0.0, 0.1, 0.2], index=index, name="time_weighted_return")
+    path = os.path.join(tmp_dir, "out.csv")
+    write_series(series, path)
+    with open(path) as f:
+        assert f.read() == series.to_csv()
+    round_trip = pd.read_csv(path)
+    assert round_trip["portfolio_id"].tolist() == ["Smith, J", 'say "hi"', "plain"]
+    assert round_trip["time_weighted_return"].tolist() == [0.0, 0.1, 0.2]
+
+def test_csv_dates_match_datetime_as_string(tmp_dir):
+    dates = pd.to_datetime(np.random.default_rng(0).integers(-60_000, 100_000, 2_000), unit="D")
+    series = pd.Series(np.zeros(len(dates)), index=pd.DatetimeIndex(dates, name="valuation_date"), name="time_weighted_return")
+    path = os.path.join(tmp_dir, "out.csv")
+    write_series(series, path)
+    with open(path) as f:
+        assert f.read() == series.to_csv()
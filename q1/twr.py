@@ -1,24 +1,69 @@
+from typing import Callable, Iterable, Optional, Union
+
 import pandas as pd
 import numpy as np
 
-def calculate_total_time_weighted_return(data: pd.DataFrame) -> pd.Series:
+try:
+    from q1.instrumentation import stage
+    from q1.valuation_series import ValuationSeries
+    from q1.utils import parse_dates
+except ImportError: # running as a script from inside q1/
+    from instrumentation import stage
+    from valuation_series import ValuationSeries
+    from utils import parse_dates
+
+ENGINES = ("numpy", "loop")
+
+def sub_period_factors(valuations: np.ndarray, cash_flows: np.ndarray) -> np.ndarray:
     """
-    Returns the decimal proportion of the total time weighted return.
+    Returns the growth factor of every sub-period as a float64 array.
 
     Args:
-        - data (pandas.DataFrame) - this must contain the columns 'total_valuation' and 'cash_flow' and be sorted by date.
+        - valuations (numpy.ndarray) - total valuation at each date, sorted by date. A 2-D array holds one history
+          per row (see scenarios.py), with dates along the last axis.
+        - cash_flows (numpy.ndarray) - cash flow at each date, aligned with valuations.
 
     Returns:
-        - a pandas.Series containing the total weighted return indexed with each sub-period.
+        - a numpy.ndarray of the same shape where element 0 is 1.0 (first row convention) and element i
+          is (valuations[i] - cash_flows[i]) / valuations[i-1], or 1.0 when valuations[i-1] is zero.
     """
+    factors = np.ones(np.shape(valuations), dtype=np.float64)
+    if factors.shape[-1] < 2:
+        return factors
+
+    # float32 inputs (compact ValuationSeries) are widened so the arithmetic is always float64; a no-op otherwise
+    valuations = np.asarray(valuations, dtype=np.float64)
+    cash_flows = np.asarray(cash_flows, dtype=np.float64)
+    prev_vals = valuations[..., :-1]
+    nonzero = prev_vals != 0 # mask avoids division by zero, masked-out periods keep factor 1.0
+    factors[..., 1:][nonzero] = (valuations[..., 1:][nonzero] - cash_flows[..., 1:][nonzero]) / prev_vals[nonzero]
+    return factors
+
+def _chained_twr(valuations: np.ndarray, cash_flows: np.ndarray, running_factor: float = 1.0,
+                 prev_val: Optional[float] = None) -> tuple[np.ndarray, float]:
+    """
+    Continue a TWR series from a carried running factor and previous valuation.
+
+    With prev_val=None the first row takes the first row convention. The cumulative product is seeded with the
+    running factor so every value is multiplied in the same order as a single pass over the full history.
+    Returns the TWR values and the new running factor.
+    """
+    if prev_val is None:
+        factors = sub_period_factors(valuations, cash_flows)
+    else:
+        factors = sub_period_factors(np.concatenate(([prev_val], valuations)), np.concatenate(([0.0], cash_flows)))[1:]
+    growth = np.cumprod(np.concatenate(([running_factor], factors)))[1:]
+    return growth - 1, float(growth[-1])
+
+def _twr_loop(data: pd.DataFrame) -> pd.Series:
+    """Reference row-by-row implementation, kept for cross-checking the vectorized engine."""
     dates = []
     twr_values = []
     running_factor = 1.0
     prev_val = None
 
-    for row in data.itertuples(index=False): # (itertuples() significantly faster than iterrows())
+    for row, date in zip(data.itertuples(index=False), _valuation_dates(data)): # (itertuples() significantly faster than iterrows())
 
-        date = pd.to_datetime(row.valuation_date, format="%d/%m/%Y")
         dates.append(date)
         current_val = row.total_valuation
         cash_flow = row.cash_flow
@@ -27,7 +72,7 @@ def calculate_total_time_weighted_return(data: pd.DataFrame) -> pd.Series:
             twr_values.append(0.0)
             prev_val = current_val
             continue
-        
+
         if prev_val != 0:
             factor = (current_val - cash_flow) / prev_val
         else: # avoids division by zero
@@ -35,9 +80,118 @@ def calculate_total_time_weighted_return(data: pd.DataFrame) -> pd.Series:
 
         running_factor *= factor
         twr_values.append(running_factor - 1)
-    
+
         prev_val = current_val
 
-    return pd.Series(data=twr_values, 
+    return pd.Series(data=twr_values,
                      index=pd.DatetimeIndex(dates),
-                     name='time_weighted_return')
\ No newline at end of file
+                     name='time_weighted_return')
+
+def _twr_vectorized(data: Union[pd.DataFrame, ValuationSeries]) -> pd.Series:
+    """Array implementation: sub-period factors and a cumulative product, no Python-level row loop."""
+    if len(data) == 0:
+        return pd.Series(data=[], index=pd.DatetimeIndex([]), name='time_weighted_return', dtype=np.float64)
+
+    if isinstance(data, ValuationSeries):
+        valuations, cash_flows, dates = data.valuations, data.cash_flows, data.dates
+    else:
+        valuations, cash_flows, dates = data["total_valuation"].to_numpy(), data["cash_flow"].to_numpy(), _valuation_dates(data)
+    twr_values = np.cumprod(sub_period_factors(valuations, cash_flows)) - 1
+    twr_values[0] = 0.0 # first row is 0 as a convention
+
+    # the only pandas object built is the result
+    return pd.Series(data=twr_values,
+                     index=pd.DatetimeIndex(dates),
+                     name='time_weighted_return')
+
+def _valuation_dates(data: pd.DataFrame) -> np.ndarray:
+    """Return the valuation_date column as datetime64 values, parsing only if parse_data has not already done so."""
+    dates = data["valuation_date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = parse_dates(dates, "%d/%m/%Y")
+    return dates.to_numpy()
+
+def calculate_total_time_weighted_return(data: Union[pd.DataFrame, ValuationSeries], engine: str = "numpy") -> pd.Series:
+    """
+    Returns the decimal proportion of the total time weighted return.
+
+    Args:
+        - data (pandas.DataFrame or ValuationSeries) - a frame must contain the columns 'total_valuation' and
+          'cash_flow' and be sorted by date. A ValuationSeries is consumed directly, without an intermediate frame.
+        - engine (str) - "numpy" (default) for the vectorized engine, or "loop" for the row-by-row reference implementation.
+
+    Returns:
+        - a pandas.Series containing the total weighted return indexed with each sub-period.
+    """
+    if engine == "numpy":
+        with stage("twr", rows=len(data)):
+            return _twr_vectorized(data)
+    if engine == "loop":
+        with stage("twr", rows=len(data)):
+            return _twr_loop(data.to_frame() if isinstance(data, ValuationSeries) else data)
+    raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(ENGINES)}")
+
+def stream_time_weighted_return(chunks: Iterable[pd.DataFrame], sink: Callable[[pd.Series], None]) -> int:
+    """
+    Computes the total time weighted return chunk by chunk, handing each chunk's results to sink as they are produced.
+
+    Args:
+        - chunks (iterable of pandas.DataFrame) - consecutive date-sorted slices of one valuation history, e.g. from
+          utils.iter_valuation_chunks. The running factor and previous valuation are carried across chunk boundaries.
+        - sink (callable) - called once per chunk with a pandas.Series shaped like calculate_total_time_weighted_return's output.
+
+    Returns:
+        - the number of rows processed. The emitted values are identical to calculate_total_time_weighted_return on the whole history.
+    """
+    running_factor = 1.0
+    prev_val = None
+    rows = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        valuations = chunk["total_valuation"].to_numpy()
+        twr_values, running_factor = _chained_twr(valuations, chunk["cash_flow"].to_numpy(), running_factor, prev_val)
+        if prev_val is None:
+            twr_values[0] = 0.0 # first row is 0 as a convention
+        prev_val = valuations[-1]
+        rows += len(chunk)
+        sink(pd.Series(data=twr_values,
+                       index=pd.DatetimeIndex(_valuation_dates(chunk)),
+                       name='time_weighted_return'))
+    return rows
+
+def calculate_portfolio_time_weighted_returns(data: pd.DataFrame) -> pd.Series:
+    """
+    Returns the total time weighted return of every portfolio in a long-format table, in one grouped pass.
+
+    Args:
+        - data (pandas.DataFrame) - this must contain the columns 'portfolio_id', 'valuation_date', 'total_valuation'
+          and 'cash_flow', with each portfolio's rows contiguous and sorted by date (as returned by parse_data).
+
+    Returns:
+        - a pandas.Series indexed by a (portfolio_id, valuation_date) MultiIndex. Each portfolio follows the same
+          rules as calculate_total_time_weighted_return: its first row is 0 and a zero previous valuation gives a factor of 1.0.
+    """
+    with stage("twr", rows=len(data)):
+        return _portfolio_twr(data)
+
+def _portfolio_twr(data: pd.DataFrame) -> pd.Series:
+    """Grouped implementation behind calculate_portfolio_time_weighted_returns."""
+    portfolio_ids = data["portfolio_id"].to_numpy()
+    index = pd.MultiIndex.from_arrays([portfolio_ids, _valuation_dates(data)], names=["portfolio_id", "valuation_date"])
+    if data.empty:
+        return pd.Series(data=[], index=index, name='time_weighted_return', dtype=np.float64)
+
+    # a group starts wherever the portfolio id changes
+    group_starts = np.ones(len(data), dtype=bool)
+    group_starts[1:] = portfolio_ids[1:] != portfolio_ids[:-1]
+
+    # factors across a group boundary compare different portfolios, so reset them to the first row convention
+    factors = sub_period_factors(data["total_valuation"].to_numpy(), data["cash_flow"].to_numpy())
+    factors[group_starts] = 1.0
+
+    group_codes = np.cumsum(group_starts)
+    twr_values = pd.Series(factors).groupby(group_codes, sort=False).cumprod().to_numpy() - 1
+    twr_values[group_starts] = 0.0
+
+    return pd.Series(data=twr_values, index=index, name='time_weighted_return')
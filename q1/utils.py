@@ -2,14 +2,77 @@
 CSV parsing and validation utilities for valuation data.
 
 - validate_csv_filename: guard against bad file extensions
-- parse_data: load CSV and enforce table layout, types and formats
+- parse_dates: pd.to_datetime for columns of repeated date strings, parsing each distinct string once
+- parse_data: load CSV and enforce table layout, types and formats. An optional 'portfolio_id'
+  column marks a long-format file holding many portfolios. fast=True selects a low-copy path
+  with explicit dtypes, fused validation and no sort for files already in order. compact=True returns a
+  ValuationSeries instead of a DataFrame.
+- iter_valuation_chunks: stream a date-sorted CSV in fixed-size validated chunks
+- iter_merged_valuation_chunks: k-way merge several date-sorted CSVs of one portfolio into one date-sorted stream
 """
 
 import os
+from collections import OrderedDict
+from typing import Iterator, Union
+
+import numpy as np
 import pandas as pd
 
+try:
+    from q1.instrumentation import attempt, stage
+    from q1.valuation_series import ValuationSeries
+except ImportError: # running as a script from inside q1/
+    from instrumentation import attempt, stage
+    from valuation_series import ValuationSeries
+
 # HELPER FUNCTIONS
 
+DATE_CACHE_MAX_ENTRIES = 65_536
+# (format, date string) -> datetime64[ns], least recently used first; shared by every file parsed in the process
+_date_cache: "OrderedDict[tuple[str, str], np.datetime64]" = OrderedDict()
+
+def clear_date_cache() -> None:
+    """Empty the parse_dates cache."""
+    _date_cache.clear()
+
+def parse_dates(column: pd.Series, format: str) -> pd.Series:
+    """
+    Equivalent to pd.to_datetime(column, format=format), but each distinct string is parsed only once.
+
+    The column is factorized into unique strings and codes; uniques are looked up in a bounded LRU cache shared across
+    calls, the rest are parsed with pd.to_datetime in one call and cached, and the results are mapped back through the
+    codes. Malformed dates raise the same ValueError as pd.to_datetime. Columns with no repeated values, or with more
+    distinct values than the cache holds, bypass the cache: there is nothing to reuse within them, and caching them
+    would only evict the repeated dates the cache is for.
+    """
+    if not pd.api.types.is_object_dtype(column) and not pd.api.types.is_string_dtype(column):
+        return pd.to_datetime(column, format=format)
+
+    codes, uniques = pd.factorize(column) # missing values get code -1
+    uniques = np.asarray(uniques, dtype=object)
+    if len(uniques) == len(column) or len(uniques) > DATE_CACHE_MAX_ENTRIES:
+        parsed = pd.to_datetime(uniques, format=format).to_numpy(dtype="datetime64[ns]")
+    else:
+        parsed = np.empty(len(uniques), dtype="datetime64[ns]")
+        missing = []
+        for i, value in enumerate(uniques):
+            cached = _date_cache.get((format, value))
+            if cached is None:
+                missing.append(i)
+            else:
+                parsed[i] = cached
+                _date_cache.move_to_end((format, value))
+        if missing:
+            parsed[missing] = pd.to_datetime(uniques[missing], format=format).to_numpy(dtype="datetime64[ns]")
+            for i in missing:
+                _date_cache[(format, uniques[i])] = parsed[i]
+            while len(_date_cache) > DATE_CACHE_MAX_ENTRIES:
+                _date_cache.popitem(last=False)
+
+    dates = parsed[codes]
+    dates[codes == -1] = np.datetime64("NaT")
+    return pd.Series(dates, index=column.index, name=column.name)
+
 def ensure_required_columns(df: pd.DataFrame, required: set[str]) -> None:
     """Raise if any of the required columns are missing."""
     missing = required - set(df.columns)
@@ -31,7 +94,7 @@ def ensure_numeric_colum(df: pd.DataFrame, column:str) -> None:
 def ensure_date_format_column(df: pd.DataFrame, column: str, format: str):
     """Raise if any of the given columns contain a format other than the specified argument 'format'."""
     try:
-        df[column] = pd.to_datetime(df[column], format=format)
+        df[column] = parse_dates(df[column], format)
     except ValueError:
         raise ValueError(f"Invalid date format in '{column}'. Expected format: {format}")
     
@@ -44,34 +107,234 @@ def validate_csv_filename(file_path: str) -> None:
         raise ValueError(
             f"Invalid file extension. Expected exactly one'.csv', got '{file_path}'. Please rename file extension to '.csv'.")
 
-# DATA PARSING FUNCTION
+# DATA PARSING FUNCTIONS
+
+CSV_ENGINES = ("c", "pyarrow")
+_FAST_DTYPES = {"valuation_date": str, "total_valuation": "float64", "cash_flow": "float64"}
+
+def _parse_data_fast(file_path: str, engine: str) -> pd.DataFrame:
+    """
+    Low-copy version of parse_data for valid files. Raises ValueError on any problem without a specific message;
+    parse_data then reruns the reference path to report it.
+    """
+    # read the header only, so usecols can be an explicit list (required by the pyarrow engine)
+    header = pd.read_csv(file_path, nrows=0).columns
+    required_cols = {"valuation_date", "total_valuation", "cash_flow"}
+    if not required_cols <= set(header):
+        raise ValueError("missing columns")
+    usecols = [col for col in header if col in required_cols or col == "portfolio_id"]
+
+    # the reader parses numbers straight to float64, a non-numeric value raises here
+    with stage("read_csv") as read_stage:
+        df = pd.read_csv(file_path, usecols=usecols, dtype=_FAST_DTYPES, engine=engine)
+        read_stage.rows = len(df)
+    if df.empty:
+        raise ValueError("no data")
+
+    # one date parse, then one fused null check: missing dates come back as NaT
+    with stage("validate", rows=len(df)):
+        dates = parse_dates(df["valuation_date"], "%d/%m/%Y")
+        nulls = dates.isna().to_numpy() | np.isnan(df["total_valuation"].to_numpy()) | np.isnan(df["cash_flow"].to_numpy())
+        if "portfolio_id" in df.columns:
+            nulls |= df["portfolio_id"].isna().to_numpy()
+        if nulls.any():
+            raise ValueError("missing values")
+        df["valuation_date"] = dates
+
+    # only sort when the file is not already in order, which avoids a full copy for the common case
+    with stage("sort", rows=len(df)):
+        days = dates.to_numpy().view(np.int64)
+        if "portfolio_id" in df.columns:
+            ids = df["portfolio_id"]
+            in_order = ids.is_monotonic_increasing and bool(np.all((ids.to_numpy()[1:] != ids.to_numpy()[:-1]) | (days[1:] >= days[:-1])))
+            if not in_order:
+                df = df.sort_values(["portfolio_id", "valuation_date"], kind="stable").reset_index(drop=True)
+        elif not np.all(days[1:] >= days[:-1]):
+            df = df.sort_values("valuation_date", kind="stable").reset_index(drop=True)
+    return df
+
+def parse_data(file_path: str, fast: bool = False, engine: str = "c", compact: bool = False) -> Union[pd.DataFrame, ValuationSeries]:
+    """
+    Load and validate a CSV of valuations. Raises ValueError or FileNotFOund error for I/O errors, structural errors, and field specific errors.
+
+    fast=True reads only the needed columns with explicit dtypes (valuations and cash flows as float64), fuses the
+    validation passes and skips the sort when the file is already in date order. engine selects the "c" or, if
+    installed, "pyarrow" CSV reader for the fast path. Invalid files fall back to the reference path, so error
+    messages are identical either way.
+
+    compact=True returns the validated data as a ValuationSeries (int32 day numbers and float64 arrays), which the
+    TWR engine consumes directly. It only applies to single-portfolio files and raises for long-format ones.
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine '{engine}'. Expected one of: {', '.join(CSV_ENGINES)}")
+    if compact:
+        return ValuationSeries.from_frame(parse_data(file_path, fast=fast, engine=engine))
+    if fast:
+        try:
+            with attempt(): # an abandoned fast path leaves no stage records behind
+                return _parse_data_fast(file_path, engine)
+        except (ValueError, FileNotFoundError):
+            pass # rerun the reference path below to raise the exact same error
 
-def parse_data(file_path: str) -> pd.DataFrame:
-    """Load and validate a CSV of valuations. Raises ValueError or FileNotFOund error for I/O errors, structural errors, and field specific errors. """
     # load file, catch I/O errors and parser errors
+    with stage("read_csv") as read_stage:
+        try:
+            df = pd.read_csv(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+        except pd.errors.EmptyDataError:
+            raise ValueError("CSV file is completely empty")
+        except pd.errors.ParserError as e:
+            raise ValueError(f"Error parsing CSV file: {e}")
+        read_stage.rows = len(df)
+    
+    # header-only check
+    if df.empty:
+        raise ValueError("The CSV file has column headers but no data")
+    
+    with stage("validate", rows=len(df)):
+        required_cols = {"valuation_date", "total_valuation", "cash_flow"}
+        ensure_required_columns(df, required_cols)
+         # use list for ordered column selection in pandas indexing
+        ensure_no_nulls(df, list(required_cols))
+
+        # field specific validations
+        ensure_date_format_column(df, "valuation_date", "%d/%m/%Y")
+        ensure_numeric_colum(df, "total_valuation")
+        ensure_numeric_colum(df, "cash_flow")
+        if "portfolio_id" in df.columns:
+            ensure_no_nulls(df, ["portfolio_id"])
+
+    with stage("sort", rows=len(df)):
+        # long-format files: sort by portfolio, then date, so each portfolio is one contiguous run
+        if "portfolio_id" in df.columns:
+            return df.sort_values(["portfolio_id", "valuation_date"], kind="stable").reset_index(drop=True)
+
+        # sort by date for downstream code
+        df = df.sort_values("valuation_date").reset_index(drop=True)
+    return df
+
+# STREAMING FUNCTIONS
+
+def iter_valuation_chunks(file_path: str, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Yield a CSV of valuations in validated chunks of at most chunk_rows rows, so memory is bounded by the chunk size.
+
+    Each chunk gets the same checks as parse_data, but nothing is sorted: the file must already be in date order and
+    a ValueError is raised at the first out-of-order row. Long-format files (with a portfolio_id column) are rejected.
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1")
+
     try:
-        df = pd.read_csv(file_path)
+        reader = pd.read_csv(file_path, chunksize=chunk_rows)
     except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {file_path}")
     except pd.errors.EmptyDataError:
         raise ValueError("CSV file is completely empty")
     except pd.errors.ParserError as e:
         raise ValueError(f"Error parsing CSV file: {e}")
-    
-    # header-only check
-    if df.empty:
-        raise ValueError("The CSV file has column headers but no data")
-    
+
     required_cols = {"valuation_date", "total_valuation", "cash_flow"}
-    ensure_required_columns(df, required_cols)
-     # use list for ordered column selection in pandas indexing
-    ensure_no_nulls(df, list(required_cols))
-
-    # field specific validations
-    ensure_date_format_column(df, "valuation_date", "%d/%m/%Y")
-    ensure_numeric_colum(df, "total_valuation")
-    ensure_numeric_colum(df, "cash_flow")
-
-    # sort by date for downstream code
-    df = df.sort_values("valuation_date").reset_index(drop=True)
-    return df
\ No newline at end of file
+    last_date = None
+    rows_seen = 0
+    with reader:
+        while True:
+            try:
+                df = next(reader)
+            except StopIteration:
+                break
+            except pd.errors.ParserError as e:
+                raise ValueError(f"Error parsing CSV file: {e}")
+
+            if "portfolio_id" in df.columns:
+                # the streamed TWR is one chained series, so rows of different portfolios would be chained together
+                raise ValueError("Streaming reads a single portfolio; split long-format data by 'portfolio_id' first")
+            if df.empty:
+                continue
+
+            ensure_required_columns(df, required_cols)
+            ensure_no_nulls(df, list(required_cols))
+            ensure_date_format_column(df, "valuation_date", "%d/%m/%Y")
+            ensure_numeric_colum(df, "total_valuation")
+            ensure_numeric_colum(df, "cash_flow")
+
+            # rows must be date-ordered within the chunk and continue on from the previous chunk
+            dates = df["valuation_date"].to_numpy()
+            out_of_order = dates[1:] < dates[:-1]
+            if last_date is not None and dates[0] < last_date:
+                raise ValueError(f"Rows are not sorted by valuation_date: row {rows_seen + 1} is out of order")
+            if out_of_order.any():
+                row = rows_seen + int(out_of_order.argmax()) + 2
+                raise ValueError(f"Rows are not sorted by valuation_date: row {row} is out of order")
+
+            last_date = dates[-1]
+            rows_seen += len(df)
+            yield df
+
+    if rows_seen == 0:
+        raise ValueError("The CSV file has column headers but no data")
+
+def _merge_source_chunks(file_path: str, chunk_rows: int) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield (int64 dates, valuations, cash flows) arrays per validated chunk, prefixing errors with the file path."""
+    try:
+        for df in iter_valuation_chunks(file_path, chunk_rows):
+            yield (df["valuation_date"].to_numpy().view(np.int64),
+                   df["total_valuation"].to_numpy(dtype=np.float64),
+                   df["cash_flow"].to_numpy(dtype=np.float64))
+    except ValueError as e:
+        raise ValueError(f"{file_path}: {e}")
+
+def iter_merged_valuation_chunks(file_paths: list[str], chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Merge several date-sorted CSVs of one portfolio into a single date-sorted stream of chunks, without a global sort.
+
+    Each file is read with iter_valuation_chunks, so it gets the same checks and must already be in date order. Only
+    one chunk per file is held at a time, so memory is O(k × chunk_rows) for k files. Each round emits every buffered
+    row dated on or before the smallest last-buffered date, which is known to be complete, and merges those k sorted
+    runs with a stable sort (timsort merges runs in O(m log k)). A date present in more than one file raises a
+    ValueError naming both files; repeated dates within one file are kept, as in parse_data.
+    """
+    if not file_paths:
+        raise ValueError("No files to merge")
+
+    sources = [_merge_source_chunks(path, chunk_rows) for path in file_paths]
+    buffers = [next(source, None) for source in sources]
+    last_date = None
+    last_source = None
+    while True:
+        active = [i for i, buffer in enumerate(buffers) if buffer is not None]
+        if not active:
+            break
+        bound = min(buffers[i][0][-1] for i in active)
+
+        parts = []
+        for i in active:
+            dates, valuations, cash_flows = buffers[i]
+            n = int(np.searchsorted(dates, bound, side="right"))
+            parts.append((dates[:n], valuations[:n], cash_flows[:n], np.full(n, i, dtype=np.int32)))
+            buffers[i] = (dates[n:], valuations[n:], cash_flows[n:]) if n < len(dates) else next(sources[i], None)
+
+        dates, valuations, cash_flows, source_ids = (np.concatenate(columns) for columns in zip(*parts))
+        order = np.argsort(dates, kind="stable")
+        dates, valuations, cash_flows, source_ids = dates[order], valuations[order], cash_flows[order], source_ids[order]
+
+        # equal dates from different files are adjacent after the merge, including across rounds
+        if last_date is not None:
+            dates_with_prev = np.concatenate(([last_date], dates))
+            sources_with_prev = np.concatenate(([last_source], source_ids))
+        else:
+            dates_with_prev, sources_with_prev = dates, source_ids
+        clashes = (dates_with_prev[1:] == dates_with_prev[:-1]) & (sources_with_prev[1:] != sources_with_prev[:-1])
+        if clashes.any():
+            i = int(clashes.argmax())
+            date = pd.Timestamp(dates_with_prev[i + 1]).strftime("%d/%m/%Y")
+            raise ValueError(f"Duplicate valuation_date {date} in '{file_paths[sources_with_prev[i]]}' "
+                             f"and '{file_paths[sources_with_prev[i + 1]]}'")
+
+        last_date, last_source = dates[-1], source_ids[-1]
+        yield pd.DataFrame({
+            "valuation_date": dates.view("datetime64[ns]"),
+            "total_valuation": valuations,
+            "cash_flow": cash_flows,
+        })
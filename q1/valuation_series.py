@@ -0,0 +1,72 @@
+"""
+Compact columnar container for one portfolio's valuation history.
+
+- ValuationSeries: contiguous arrays of int32 day numbers, valuations and cash flows, consumed directly by the TWR
+  engine. Build one with parse_data(..., compact=True) or ValuationSeries.from_frame, and convert to pandas only at
+  the edge with to_frame.
+
+A parsed DataFrame holds datetime64[ns] dates, a RangeIndex and pandas block metadata. ValuationSeries stores
+20 bytes per row (12 with float32 values) and no per-object overhead, and the constructor keeps arrays that already
+have the right dtype without copying, so the columns can be memory maps or views into shared memory.
+"""
+
+import numpy as np
+import pandas as pd
+
+FLOAT_DTYPES = (np.float64, np.float32)
+_NS_PER_DAY = 86_400 * 10 ** 9
+
+class ValuationSeries:
+    """
+    A date-sorted valuation history held as three aligned arrays.
+
+    Attributes:
+        - days (numpy.ndarray) - int32 day numbers since 1970-01-01 (the integer view of datetime64[D]).
+        - valuations (numpy.ndarray) - total valuation at each date, float64 or float32.
+        - cash_flows (numpy.ndarray) - cash flow at each date, same dtype as valuations.
+    """
+    __slots__ = ("days", "valuations", "cash_flows")
+
+    def __init__(self, days, valuations, cash_flows, float_dtype=np.float64):
+        if np.dtype(float_dtype) not in FLOAT_DTYPES:
+            raise ValueError(f"Unsupported float dtype '{np.dtype(float_dtype)}'. Expected float64 or float32")
+        self.days = np.asarray(days, dtype=np.int32)
+        self.valuations = np.asarray(valuations, dtype=float_dtype)
+        self.cash_flows = np.asarray(cash_flows, dtype=float_dtype)
+        if not len(self.days) == len(self.valuations) == len(self.cash_flows):
+            raise ValueError("days, valuations and cash_flows must have the same length")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, float_dtype=np.float64) -> "ValuationSeries":
+        """Build from a frame shaped like parse_data's output (one portfolio, sorted by date)."""
+        if "portfolio_id" in df.columns:
+            raise ValueError("ValuationSeries holds a single portfolio; split long-format data by 'portfolio_id' first")
+        days = df["valuation_date"].to_numpy().astype("datetime64[D]").view(np.int64)
+        return cls(days, df["total_valuation"].to_numpy(), df["cash_flow"].to_numpy(), float_dtype)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __repr__(self) -> str:
+        return f"ValuationSeries({len(self)} rows, {self.valuations.dtype})"
+
+    @property
+    def dates(self) -> np.ndarray:
+        """The dates as datetime64[ns], the resolution parse_data produces."""
+        return (self.days.astype(np.int64) * _NS_PER_DAY).view("datetime64[ns]")
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + self.valuations.nbytes + self.cash_flows.nbytes
+
+    def astype(self, float_dtype) -> "ValuationSeries":
+        """Return a copy with valuations and cash flows in float_dtype (float64 or float32)."""
+        return ValuationSeries(self.days, self.valuations, self.cash_flows, float_dtype)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Convert to a DataFrame with the same columns and dtypes as parse_data."""
+        return pd.DataFrame({
+            "valuation_date": self.dates,
+            "total_valuation": self.valuations.astype(np.float64),
+            "cash_flow": self.cash_flows.astype(np.float64),
+        })
@@ -0,0 +1,229 @@
+"""
+Bulk output writers for TWR results.
+
+- open_writer: open a streaming writer for CSV, Parquet, Arrow IPC or raw NumPy (.npy) output
+- write_series: write a whole result Series through a writer in bulk chunks
+
+Every writer accepts the Series returned by the TWR functions, including MultiIndex results from multi-portfolio and
+multi-file runs, so a whole run lands in one combined file. Each index level becomes a column, followed by the value
+column. Rows are written in chunks of whole arrays rather than row by row. Dates and text are formatted in bulk;
+CSV floats still go through repr one value at a time, which is most of the cost of CSV output.
+Parquet and Arrow need pyarrow, which is optional.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_FORMATS = ("csv", "parquet", "arrow", "npy")
+_EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".npy": "npy"}
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+def infer_format(path: str) -> str:
+    """Return the output format implied by a file extension, defaulting to CSV."""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+
+def _columns(series: pd.Series) -> dict[str, np.ndarray]:
+    """Split a result Series into named column arrays: one per index level, then the values."""
+    names = [name if name is not None else ("valuation_date" if i == series.index.nlevels - 1 else f"level_{i}")
+             for i, name in enumerate(series.index.names)]
+    columns = {name: series.index.get_level_values(i).to_numpy() for i, name in enumerate(names)}
+    columns[series.name or "time_weighted_return"] = series.to_numpy()
+    return columns
+
+def _format_float(value: float) -> str:
+    return repr(value) if value == value else ""
+
+# CSV quoting as pandas.Series.to_csv applies it (csv.QUOTE_MINIMAL): fields with a delimiter, quote or line break
+# are quoted, with quotes doubled
+_CSV_SPECIAL = (",", '"', "\r", "\n")
+
+def _quote(text: str) -> str:
+    if any(char in text for char in _CSV_SPECIAL):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def _format_text(values: np.ndarray) -> list[str]:
+    """Quote each distinct value once: text columns (portfolio ids, file paths) repeat on every row of their group."""
+    codes, uniques = pd.factorize(values)
+    formatted = np.array([_quote(str(value)) for value in uniques] + [""], dtype=object) # code -1 (missing) is empty
+    return formatted[codes].tolist()
+
+# "0000" to "9999" as rows of UCS-4 code points, so dates are assembled as a fixed-width string array by indexing
+_DIGITS = np.array([[ord(char) for char in f"{i:04d}"] for i in range(10_000)], dtype=np.uint32)
+
+def _format_dates(values: np.ndarray) -> list[str]:
+    """
+    ISO dates (YYYY-MM-DD), as numpy.datetime_as_string(values, unit="D") gives them, computed in bulk: the civil
+    date of each day number by integer arithmetic, then the digits by table lookup into one "<U10" array.
+    """
+    z = values.astype("datetime64[D]").astype(np.int64) + 719_468 # days since 0000-03-01
+    era = z // 146_097 # 400-year cycles
+    day_of_era = z - era * 146_097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36_524 - day_of_era // 146_096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100) # from 1 March
+    shifted_month = (5 * day_of_year + 2) // 153 # 0 = March
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = np.where(shifted_month < 10, shifted_month + 3, shifted_month - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    if len(year) and (year.min() < 0 or year.max() > 9999): # NaT, or dates that do not fit four digits
+        return np.datetime_as_string(values, unit="D").tolist()
+
+    chars = np.empty((len(values), 10), dtype=np.uint32)
+    chars[:, 4] = chars[:, 7] = ord("-")
+    chars[:, 0:4] = _DIGITS.take(year, axis=0)
+    chars[:, 5:7] = _DIGITS.take(month, axis=0)[:, 2:]
+    chars[:, 8:10] = _DIGITS.take(day, axis=0)[:, 2:]
+    return chars.view("<U10").ravel().tolist()
+
+class _Writer:
+    """Shared context-manager behaviour; subclasses implement write() and close()."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class CsvWriter(_Writer):
+    """
+    CSV with a header row. Values are formatted and quoted like pandas.Series.to_csv (shortest round-trip floats, ISO
+    dates, text quoted when it holds a comma, quote or line break).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "w", newline="", buffering=1024 * 1024)
+        self._header_written = False
+
+    def write(self, series: pd.Series) -> None:
+        columns = _columns(series)
+        if not self._header_written:
+            self._file.write(",".join(map(_quote, columns)) + "\n")
+            self._header_written = True
+        if series.empty:
+            return
+
+        formatted = []
+        for values in columns.values():
+            if np.issubdtype(values.dtype, np.datetime64):
+                formatted.append(_format_dates(values))
+            elif values.dtype == np.float64:
+                # NaN is written as an empty field, as pandas does. NumPy has no bulk shortest round-trip float
+                # formatter (astype(str) calls repr per element too), so this map is the remaining per-value cost
+                format_float = _format_float if np.isnan(values).any() else repr
+                formatted.append(map(format_float, values.tolist()))
+            elif values.dtype == object:
+                formatted.append(_format_text(values))
+            else:
+                formatted.append(map(str, values.tolist()))
+        self._file.write("\n".join(map(",".join, zip(*formatted))) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+class NumpyWriter(_Writer):
+    """
+    A .npy file holding one structured array with a field per column, readable with numpy.load.
+
+    The header is written with room for the largest possible row count and rewritten with the real count on close,
+    so rows can be appended chunk by chunk. Text columns are stored as fixed-width Unicode, sized from template (the
+    whole result, when it is known up front) or else from the first chunk; a later chunk with longer text raises.
+    """
+
+    _MAGIC = b"\x93NUMPY\x01\x00"
+
+    def __init__(self, path: str, template: Optional[pd.Series] = None):
+        self._file = open(path, "wb")
+        self._dtype: Optional[np.dtype] = None
+        self._template = template
+        self._header_length = 0
+        self._count = 0
+
+    def _header(self, count: int) -> bytes:
+        header = repr({"descr": np.lib.format.dtype_to_descr(self._dtype), "fortran_order": False, "shape": (count,)})
+        return header.encode("latin1")
+
+    def write(self, series: pd.Series) -> None:
+        columns = _columns(series)
+        if self._dtype is None:
+            fields = []
+            for name, values in _columns(self._template if self._template is not None else series).items():
+                if values.dtype == object:
+                    values = values.astype(str)
+                fields.append((name, values.dtype))
+            self._dtype = np.dtype(fields)
+            # reserve space for the widest shape, keeping the total header a multiple of 64 bytes
+            longest = len(self._MAGIC) + 2 + len(self._header(np.iinfo(np.int64).max)) + 1
+            self._header_length = -(-longest // 64) * 64 - len(self._MAGIC) - 2
+            self._file.write(b"\0" * (len(self._MAGIC) + 2 + self._header_length))
+
+        records = np.empty(len(series), dtype=self._dtype)
+        for name, values in columns.items():
+            if values.dtype == object:
+                values = values.astype(str)
+                if values.dtype.itemsize > self._dtype[name].itemsize:
+                    raise ValueError(f"Values in '{name}' are longer than the width fixed by the first chunk")
+            records[name] = values
+        records.tofile(self._file)
+        self._count += len(records)
+
+    def close(self) -> None:
+        if self._dtype is not None:
+            header = self._header(self._count).ljust(self._header_length - 1) + b"\n"
+            self._file.seek(0)
+            self._file.write(self._MAGIC + len(header).to_bytes(2, "little") + header)
+        self._file.close()
+
+class ArrowWriter(_Writer):
+    """Parquet (file_format="parquet") or Arrow IPC (file_format="arrow") output, one record batch per chunk."""
+
+    def __init__(self, path: str, file_format: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError(f"{file_format} output requires pyarrow. Install it with 'pip install pyarrow' or use csv/npy output")
+        self._pa = pa
+        self._pq = pq
+        self._path = path
+        self._file_format = file_format
+        self._writer = None
+
+    def write(self, series: pd.Series) -> None:
+        columns = {name: values.astype(str) if values.dtype == object else values for name, values in _columns(series).items()}
+        table = self._pa.table(columns)
+        if self._writer is None:
+            if self._file_format == "parquet":
+                self._writer = self._pq.ParquetWriter(self._path, table.schema)
+            else:
+                self._writer = self._pa.ipc.new_file(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+def open_writer(path: str, file_format: Optional[str] = None, template: Optional[pd.Series] = None):
+    """
+    Open a writer for path. file_format is one of OUTPUT_FORMATS, or None to infer it from the extension. template is
+    the whole result when it is known up front, which lets the npy writer size its text columns.
+    """
+    file_format = file_format or infer_format(path)
+    if file_format == "csv":
+        return CsvWriter(path)
+    if file_format == "npy":
+        return NumpyWriter(path, template)
+    if file_format in ("parquet", "arrow"):
+        return ArrowWriter(path, file_format)
+    raise ValueError(f"Unknown output format '{file_format}'. Expected one of: {', '.join(OUTPUT_FORMATS)}")
+
+def write_series(series: pd.Series, path: str, file_format: Optional[str] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> None:
+    """Write a whole result Series to path in bulk chunks of chunk_rows rows."""
+    with open_writer(path, file_format, template=series) as writer:
+        if series.empty:
+            writer.write(series)
+        for start in range(0, len(series), chunk_rows):
+            writer.write(series.iloc[start:start + chunk_rows])
@@ -0,0 +1,123 @@
+"""
+Batch mode for many short plans per run.
+
+- solve_batch: solve a list of plans with one fill_plan call, reporting errors per plan
+- iter_batch_results: solve newline-delimited plans chunk by chunk, optionally in worker processes, in input order
+- run_batch: read plans from a file or stdin, write one solution line per plan and report throughput
+
+Plans in a chunk are joined with two zero bytes between them. fill_plan pads the ends of a plan with zero bytes, which
+never match a candidate, so every plan in the joined buffer sees exactly the context it would see on its own, and a
+chunk costs one NumPy pass instead of one Python call per plan.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+import numpy as np
+
+try:
+    from q2.filter_plan import _fill_runs, _DEAD_END
+except ImportError: # running as a script from inside q2/
+    from filter_plan import _fill_runs, _DEAD_END
+
+DEFAULT_CHUNK_LINES = 10_000
+_SEPARATOR = b"\0\0"
+
+def _plan_error(plan: bytes) -> Optional[str]:
+    """Return why a plan is malformed, or None if it only contains "a", "b" and "?"."""
+    if not plan:
+        return "Empty plan"
+    invalid = plan.translate(None, b"ab?")
+    if invalid:
+        return f"Invalid character {chr(invalid[0])!r}: plans may only contain 'a', 'b' and '?'"
+    return None
+
+def solve_batch(plans: list[bytes]) -> list[tuple[Optional[bytes], Optional[str]]]:
+    """
+    Returns a (solution, error) pair per plan, in order: exactly one of the two is None.
+
+    Valid plans are solved together in one joined buffer. Runs of "?" with no valid filling are mapped back to their
+    plan through the plans' offsets in the buffer, so an unsolvable plan does not hold up the rest of its chunk.
+    """
+    results = [(None, _plan_error(plan)) for plan in plans]
+    valid = [i for i, (_, error) in enumerate(results) if error is None]
+    if not valid:
+        return results
+
+    buffer = bytearray(_SEPARATOR.join(plans[i] for i in valid))
+    failures = _fill_runs(buffer, collect_failures=True)
+    failed = {}
+    if failures:
+        offsets = np.cumsum([len(plans[i]) + len(_SEPARATOR) for i in valid]) - len(_SEPARATOR)
+        for position in failures:
+            k = int(np.searchsorted(offsets, position, side="right"))
+            plan_start = int(offsets[k - 1]) + len(_SEPARATOR) if k else 0
+            failed.setdefault(k, position - plan_start)
+    for k, (i, solution) in enumerate(zip(valid, bytes(buffer).split(_SEPARATOR))):
+        if k in failed:
+            results[i] = (None, f"No valid filter in the run of '?' at position {failed[k]}: {_DEAD_END}")
+        else:
+            results[i] = (solution, None)
+    return results
+
+def _chunks(lines: Iterable[bytes], chunk_lines: int) -> Iterator[list[bytes]]:
+    chunk = []
+    for line in lines:
+        chunk.append(line.strip())
+        if len(chunk) == chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_batch_results(lines: Iterable[bytes], workers: Optional[int] = None,
+                       chunk_lines: int = DEFAULT_CHUNK_LINES) -> Iterator[tuple[Optional[bytes], Optional[str]]]:
+    """
+    Yield a (solution, error) pair for every line, in input order.
+
+    Args:
+        - lines (iterable of bytes) - one plan per line; surrounding whitespace is ignored.
+        - workers (int) - solve chunks in this many worker processes. None or 1 solves in this process.
+        - chunk_lines (int) - lines per chunk. With workers, at most two chunks per worker are in flight, so memory
+          stays bounded however long the input is.
+    """
+    if chunk_lines < 1:
+        raise ValueError("chunk_lines must be at least 1")
+    chunks = _chunks(lines, chunk_lines)
+    if workers is None or workers <= 1:
+        for chunk in chunks:
+            yield from solve_batch(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(solve_batch, chunk))
+            if len(in_flight) >= 2 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+def run_batch(source: BinaryIO, sink: BinaryIO, report, workers: Optional[int] = None,
+              chunk_lines: int = DEFAULT_CHUNK_LINES) -> tuple[int, int, float]:
+    """
+    Solve every line of source, writing one line per plan to sink: the solution, or an empty line for a plan that is
+    malformed or where the greedy fill dead-ends, so output line N always answers input line N. Errors are written to report (a text
+    stream) as "line N: message".
+
+    Returns:
+        - (plans, errors, seconds) for the run; plans / seconds is the throughput.
+    """
+    start = time.perf_counter()
+    plans = errors = 0
+    for line_number, (solution, error) in enumerate(iter_batch_results(source, workers, chunk_lines), start=1):
+        plans += 1
+        if error is not None:
+            errors += 1
+            print(f"line {line_number}: {error}", file=report)
+            sink.write(b"\n")
+        else:
+            sink.write(solution + b"\n")
+    return plans, errors, time.perf_counter() - start
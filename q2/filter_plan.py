@@ -1,4 +1,9 @@
 import argparse
+import sys
+from functools import lru_cache
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -6,10 +11,51 @@ def parse_args():
         description="Given a string, returns a plan for the setup of carbon filters on a street"
     )
     parser.add_argument(
-        "input_string",
+        "input_string", nargs="?",
         help="The string that the plan is being devised for"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--file", metavar="PATH",
+        help="Stream the plan from this file ('-' for stdin) in fixed-size chunks instead of taking it as an argument, "
+             "writing the solution to stdout as it is produced. Memory stays constant for any plan length"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help="Bytes read per chunk with --file (default: 1 MiB)"
+    )
+    parser.add_argument(
+        "--batch", metavar="PATH",
+        help="Solve many plans, one per line, from this file ('-' for stdin). Prints one solution line per plan in input "
+             "order (empty for plans with errors), reports errors per line and throughput on stderr"
+    )
+    parser.add_argument(
+        "--batch-chunk-lines", type=int, default=10_000,
+        help="Lines solved together per chunk with --batch (default: 10,000)"
+    )
+    parser.add_argument(
+        "--workers", type=int,
+        help="Worker processes: solves independent segments of a long input_string (see parallel.py), "
+             "or chunks of lines with --batch"
+    )
+    parser.add_argument(
+        "--costs", type=float, nargs=2, metavar=("COST_A", "COST_B"),
+        help="Print the cheapest valid plan and its cost for these per-letter costs instead of the greedy plan "
+             "(see optimal.py). Unlike the greedy plan, this never fails when a solution exists"
+    )
+    parser.add_argument(
+        "--count", action="store_true",
+        help="Print the number of valid plans for input_string instead of a plan"
+    )
+    parser.add_argument(
+        "--modulus", type=int,
+        help="With --count, print the number of valid plans modulo this number"
+    )
+    args = parser.parse_args()
+    if (args.costs or args.count) and args.input_string is None:
+        parser.error("--costs and --count need an input_string")
+    if sum(arg is not None for arg in (args.input_string, args.file, args.batch)) != 1:
+        parser.error("give exactly one of input_string, --file or --batch")
+    return args
 
 def filter_plan(input_str: str) -> str:
     """
@@ -65,10 +111,226 @@ def filter_plan(input_str: str) -> str:
 
     return "".join(solution)
 
+# FAST PATH
+
+_A, _B, _UNKNOWN = ord("a"), ord("b"), ord("?")
+_MAX_RUN = 64 # longer runs of "?" are filled in blocks of this size
+_MEMO_MAX_ENTRIES = 65_536
+# the greedy fill can dead-end on a plan that has a solution ("a??bb" fails, though "ababb" is valid), so its errors
+# only report where it got stuck
+_DEAD_END = "the greedy fill dead-ends here, though the plan may still have a solution (see optimal.min_cost_plan)"
+# packed (context, run length) key -> (filling, last filled byte shifted into the left-context slot of the next key)
+_memo: dict[int, tuple[Optional[bytes], int]] = {}
+
+@lru_cache(maxsize=4096)
+def _solve_run(left: bytes, length: int, right: bytes) -> Optional[bytes]:
+    """
+    Fill a run of length "?"s between 2 bytes of resolved left context and 2 bytes of original right context, with
+    exactly the checks and tie-breaking of filter_plan. Zero bytes pad the ends of the plan and never match a
+    candidate, which stands in for filter_plan's bounds checks. Returns None if a position has no valid choice.
+    """
+    buf = bytearray(left + b"?" * length + right)
+    for i in range(2, 2 + length):
+        for candidate in (_A, _B):
+            if buf[i-2] == buf[i-1] == candidate: # left peek
+                continue
+            if buf[i+2] == buf[i+1] == candidate: # right peek
+                continue
+            if buf[i-1] == candidate == buf[i+1]: # middle peek
+                continue
+            buf[i] = candidate
+            break
+        else:
+            return None
+    return bytes(buf[2:2 + length])
+
+def _solve_key(key: int) -> tuple[Optional[bytes], int]:
+    """Unpack a memo key (see fill_plan), solve the run and cache the result."""
+    filling = _solve_run(bytes([key >> 48, (key >> 40) & 0xFF]), key & 0xFFFFFF, bytes([(key >> 32) & 0xFF, (key >> 24) & 0xFF]))
+    entry = (filling, filling[-1] << 48 if filling else 0)
+    if len(_memo) >= _MEMO_MAX_ENTRIES:
+        _memo.clear()
+    _memo[key] = entry
+    return entry
+
+def _solve_long_run(left: bytes, length: int, right: bytes) -> Optional[bytes]:
+    """Fill a long run block by block: each block sees the two bytes it filled last and the two "?"s after it."""
+    filled = bytearray(left)
+    for start in range(0, length, _MAX_RUN):
+        stop = min(start + _MAX_RUN, length)
+        block_right = (b"?" * min(length - stop, 2) + right)[:2]
+        block = _solve_run(bytes(filled[-2:]), stop - start, block_right)
+        if block is None:
+            return None
+        filled += block
+    return bytes(filled[2:])
+
+def fill_plan(buffer: Union[bytearray, memoryview]) -> None:
+    """
+    Resolve every "?" of an ASCII plan in place, with the same result as filter_plan.
+
+    Args:
+        - buffer (bytearray, or any writable byte buffer such as a numpy uint8 array) - the plan, modified in place.
+
+    Each "?" only looks two characters either side, so the filling of a run of "?"s is fixed by its length, the two
+    resolved characters before it and the two original characters after it. Runs and their static context are found
+    with NumPy; a single loop over the runs then looks each filling up in a memo keyed on that context, taking the
+    left character from the previous run's filling when only one fixed letter separates them. The fillings are
+    scattered back into the "?" positions in one assignment, so fixed letters are never visited individually.
+
+    Raises a ValueError if some "?" has no valid choice given the greedy choices before it (filter_plan raises an
+    IndexError there). That does not prove the plan has no solution; optimal.is_feasible decides that.
+    """
+    failures = _fill_runs(buffer, collect_failures=False)
+    if failures:
+        raise ValueError(f"No valid filter in the run of '?' at position {failures[0]}: {_DEAD_END}")
+
+def _fill_runs(buffer: Union[bytearray, memoryview], collect_failures: bool) -> list[int]:
+    """
+    fill_plan's implementation. Returns the start position of every run of "?" with no valid filling. Without
+    collect_failures it stops at the first one and leaves buffer untouched; with it, such runs are left as "?" and
+    the rest of the buffer is still filled.
+    """
+    view = memoryview(buffer).cast("B")
+    plan = np.zeros(len(view) + 4, dtype=np.uint8) # two zero bytes of padding at each end
+    plan[2:-2] = np.frombuffer(view, dtype=np.uint8)
+    unknown = plan == _UNKNOWN
+    if not unknown.any():
+        return []
+    edges = np.flatnonzero(np.diff(unknown.view(np.int8)))
+    starts, ends = edges[0::2] + 1, edges[1::2] + 1
+    lengths = ends - starts
+
+    # the character two before a run is a "?" exactly when the previous run ends one fixed letter before this one
+    dependent = np.zeros(len(starts), dtype=bool)
+    dependent[1:] = starts[1:] - ends[:-1] == 1
+    left2 = np.where(dependent, 0, plan[starts - 2]).astype(np.int64)
+    keys = ((left2 << 48) | (plan[starts - 1].astype(np.int64) << 40) | (plan[ends].astype(np.int64) << 32)
+            | (plan[ends + 1].astype(np.int64) << 24) | np.minimum(lengths, _MAX_RUN + 1))
+    # mode 0: memo lookup, 1: memo lookup after adding the previous run's last byte, 2/3: long run (static/dependent)
+    long_runs = lengths > _MAX_RUN
+    modes = dependent.astype(np.int8) + 2 * long_runs
+    long_lengths = iter(lengths[long_runs].tolist())
+
+    fillings = []
+    failures = []
+    last = 0
+    memo = _memo
+    for key, mode in zip(keys.tolist(), modes.tolist()):
+        if mode >= 2:
+            left = bytes([last >> 48 if mode == 3 else key >> 48, (key >> 40) & 0xFF])
+            filling = _solve_long_run(left, next(long_lengths), bytes([(key >> 32) & 0xFF, (key >> 24) & 0xFF]))
+            tail = filling[-1] << 48 if filling else 0
+        else:
+            if mode == 1:
+                key += last
+            filling, tail = memo.get(key) or _solve_key(key)
+        if filling is None:
+            failures.append(int(starts[len(fillings)]) - 2)
+            if not collect_failures:
+                return failures
+            filling = b"?" * int(lengths[len(fillings)])
+        fillings.append(filling)
+        last = tail
+
+    plan[unknown] = np.frombuffer(b"".join(fillings), dtype=np.uint8)
+    view[:] = plan[2:-2].data
+    return failures
+
+def filter_plan_fast(input_str: str) -> str:
+    """filter_plan on a byte buffer: identical output, with one Python step per run of "?" instead of per character."""
+    buffer = bytearray(input_str.encode("ascii"))
+    fill_plan(buffer)
+    return buffer.decode("ascii")
+
+# STREAMING
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+_WHITESPACE = b" \t\r\n"
+
+def stream_filter_plan(source: BinaryIO, sink: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Solve a plan read from source in chunks of chunk_size bytes, writing the solution to sink as it is produced.
+
+    Args:
+        - source (binary file) - the plan. Whitespace (e.g. line breaks in a wrapped file or a trailing newline) is ignored.
+        - sink (binary file) - receives the solution, identical to filter_plan_fast on the whole plan.
+
+    Returns:
+        - the number of characters written.
+
+    A "?" needs the two resolved characters before it and the two original characters after it. So each round
+    solves the two resolved characters carried from the previous round plus the new input, and writes out all of it
+    except the last two characters, which wait for the next chunk's lookahead. Memory is bounded by chunk_size.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    left = b"" # last two written characters, resolved
+    pending = b"" # input read but not yet written, at most two characters
+    written = 0
+    while chunk := source.read(chunk_size):
+        data = pending + chunk.translate(None, _WHITESPACE)
+        if len(data) <= 2:
+            pending = data
+            continue
+        work = bytearray(left + data)
+        try:
+            fill_plan(work) # the last two positions are solved without lookahead, so they are discarded below
+        except ValueError:
+            raise ValueError(f"No valid filter between characters {written} and {written + len(data) - 2}: {_DEAD_END}")
+        sink.write(work[len(left):-2])
+        written += len(data) - 2
+        left = bytes(work[-4:-2])
+        pending = data[-2:]
+
+    work = bytearray(left + pending)
+    try:
+        fill_plan(work)
+    except ValueError:
+        raise ValueError(f"No valid filter after character {written}: {_DEAD_END}")
+    sink.write(work[len(left):])
+    return written + len(pending)
+
 def main():
     args = parse_args()
-    result = filter_plan(args.input_string)
-    print(result)
+    if args.batch is not None:
+        from batch import run_batch
+        source = sys.stdin.buffer if args.batch == "-" else open(args.batch, "rb")
+        try:
+            plans, errors, seconds = run_batch(source, sys.stdout.buffer, sys.stderr, args.workers, args.batch_chunk_lines)
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+        rate = plans / seconds if seconds > 0 else float("inf")
+        print(f"Solved {plans - errors} of {plans} plans ({errors} errors) in {seconds:.3f}s: {rate:,.0f} plans/sec", file=sys.stderr)
+        return
+    if args.count:
+        from optimal import count_plans
+        print(count_plans(args.input_string, args.modulus))
+        return
+    if args.costs:
+        from optimal import min_cost_plan
+        plan, cost = min_cost_plan(args.input_string, {"a": args.costs[0], "b": args.costs[1]})
+        print(plan)
+        print(f"Cost: {cost:g}", file=sys.stderr)
+        return
+    if args.file is None:
+        if args.workers is not None:
+            from parallel import parallel_filter_plan
+            result = parallel_filter_plan(args.input_string, workers=args.workers)
+        else:
+            result = filter_plan_fast(args.input_string)
+        print(result)
+        return
+
+    sink = sys.stdout.buffer
+    if args.file == "-":
+        stream_filter_plan(sys.stdin.buffer, sink, args.chunk_size)
+    else:
+        with open(args.file, "rb") as source:
+            stream_filter_plan(source, sink, args.chunk_size)
+    sink.write(b"\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Dynamic-programming engine for filter plans over the last-two-characters state.
+
+- min_cost_plan: the cheapest valid plan under per-letter and per-position costs, or a ValueError if there is none
+- count_plans: the exact number of valid plans, or the number modulo a given modulus
+- is_feasible: whether any valid plan exists
+
+Unlike the greedy filter_plan, nothing here assumes a solution exists. A plan is valid if it keeps every fixed letter
+and has no three equal letters in a row, so whether a letter may follow depends only on the previous two: the state
+is one of the four pairs aa, ab, ba, bb, indexed as 2 * first + second with a = 0 and b = 1.
+"""
+
+from itertools import chain
+from typing import Iterator, Optional
+
+import numpy as np
+
+_A, _B, _UNKNOWN = ord("a"), ord("b"), ord("?")
+_INF = float("inf")
+_EXACT_BLOCK = 64 # counts over 64 positions are below 2**45, so blocks up to this size are multiplied exactly in int64
+_NUMPY_MODULUS_LIMIT = 1 << 30 # below this, a sum of four products of residues still fits in int64
+_COST_BLOCK = 65_536 # positions of per-position costs converted to Python floats at a time
+
+def _reversed_costs(plan: np.ndarray, letter_costs: Optional[dict], position_costs) -> Iterator[tuple[float, float]]:
+    """
+    Cost of placing "a" and of placing "b" at every position, infinite where a fixed letter forbids it, from the last
+    position to the first. Costs are produced as Python floats without a list of the whole plan: from the letter costs
+    alone through a lookup per character, otherwise from the cost arrays _COST_BLOCK positions at a time.
+    """
+    letter_costs = letter_costs or {}
+    cost_a, cost_b = float(letter_costs.get("a", 0.0)), float(letter_costs.get("b", 0.0))
+    if position_costs is None:
+        by_char = {_A: (cost_a, _INF), _B: (_INF, cost_b), _UNKNOWN: (cost_a, cost_b)}
+        return map(by_char.__getitem__, plan[::-1].tobytes())
+    position_costs = np.asarray(position_costs, dtype=np.float64)
+    if position_costs.shape != (len(plan), 2):
+        raise ValueError(f"position_costs must have shape ({len(plan)}, 2), got {position_costs.shape}")
+    costs_a = position_costs[::-1, 0] + cost_a
+    costs_b = position_costs[::-1, 1] + cost_b
+    costs_a[plan[::-1] == _B] = _INF
+    costs_b[plan[::-1] == _A] = _INF
+    return chain.from_iterable(zip(costs_a[start:start + _COST_BLOCK].tolist(), costs_b[start:start + _COST_BLOCK].tolist())
+                               for start in range(0, len(plan), _COST_BLOCK))
+
+def _as_array(input_str: str) -> np.ndarray:
+    plan = np.frombuffer(input_str.encode("ascii"), dtype=np.uint8)
+    invalid = (plan != _A) & (plan != _B) & (plan != _UNKNOWN)
+    if invalid.any():
+        raise ValueError(f"Invalid character {chr(plan[invalid.argmax()])!r}: plans may only contain 'a', 'b' and '?'")
+    return plan
+
+def min_cost_plan(input_str: str, letter_costs: Optional[dict] = None, position_costs=None) -> tuple[str, float]:
+    """
+    Returns the cheapest valid plan and its cost, where the cost of a plan is the sum of the cost of its letter at
+    every position.
+
+    Args:
+        - input_str (str) - containing only "a", "b" and "?".
+        - letter_costs (dict) - cost of each "a" and each "b", e.g. {"a": 1.0, "b": 1.5}. Missing letters cost 0.
+        - position_costs (array-like of shape (n, 2)) - extra cost of "a" and of "b" at each position. An infinite
+          cost forbids that letter there.
+
+    Returns:
+        - (plan, cost). Among plans of equal cost, the alphabetically first is returned, so with equal letter costs
+          the result is exactly filter_plan's whenever filter_plan finds a solution.
+
+    Raises a ValueError if no valid plan exists.
+
+    The DP runs right to left, so each state's cost is that of the cheapest completion of the rest of the plan, and
+    the plan is then read off left to right, preferring "a" on ties. Only the running costs of the four states and a
+    compact table of tie-broken choices (one byte per position) are kept, and the costs are streamed into the loop
+    rather than converted to lists for the whole plan.
+    """
+    plan = _as_array(input_str)
+    n = len(plan)
+    if n == 0:
+        return "", 0.0
+    # walk the reversed plan: a state is (letter at j - 1, letter at j) in reversed order
+    costs = _reversed_costs(plan, letter_costs, position_costs)
+    if n == 1:
+        cost_a, cost_b = next(costs)
+        if min(cost_a, cost_b) == _INF:
+            raise ValueError("The plan has no solution")
+        return ("a", cost_a) if cost_a <= cost_b else ("b", cost_b)
+
+    (a0, b0), (a1, b1) = next(costs), next(costs)
+    aa, ab, ba, bb = a0 + a1, a0 + b1, b0 + a1, b0 + b1
+    # choices[j]: bit 0 set if state ab at j came from ba (not aa), bit 1 set if state ba came from bb (not ab)
+    choices = bytearray(n)
+    for j, (ca, cb) in enumerate(costs, 2):
+        if aa <= ba:
+            new_ab = aa + cb
+            choice = 0
+        else:
+            new_ab = ba + cb
+            choice = 1
+        if ab <= bb:
+            new_ba = ab + ca
+        else:
+            new_ba = bb + ca
+            choice |= 2
+        aa, ab, ba, bb = ba + ca, new_ab, new_ba, ab + cb
+        choices[j] = choice
+
+    # the final state is (plan[1], plan[0]); prefer plan[0] == "a", then plan[1] == "a"
+    state, best = min(((0, aa), (2, ba), (1, ab), (3, bb)), key=lambda item: item[1])
+    if best == _INF:
+        raise ValueError("The plan has no solution")
+
+    result = bytearray(n)
+    result[0] = _A + (state & 1)
+    result[1] = _A + (state >> 1)
+    for j in range(n - 1, 1, -1):
+        if state == 0: # aa can only follow b
+            first = 1
+        elif state == 3: # bb can only follow a
+            first = 0
+        elif state == 1:
+            first = choices[j] & 1
+        else:
+            first = choices[j] >> 1
+        # state (first, second) at j - 1: first is the letter at reversed position j - 2
+        state = (first << 1) | (state >> 1)
+        result[n - 1 - (j - 2)] = _A + first
+    return result.decode("ascii"), float(best)
+
+def _transfer_matrices(plan: np.ndarray) -> np.ndarray:
+    """One 4x4 0/1 matrix per position from 2 on: entry [s, t] is 1 if state s may be followed by state t there."""
+    base = np.zeros((3, 4, 4), dtype=np.int64) # for "a", "b" and "?"
+    for first in range(2):
+        for second in range(2):
+            for letter in range(2):
+                if first == second == letter:
+                    continue
+                target = (second << 1) | letter
+                base[letter, (first << 1) | second, target] = 1
+                base[2, (first << 1) | second, target] = 1
+    kinds = np.where(plan[2:] == _A, 0, np.where(plan[2:] == _B, 1, 2))
+    return base[kinds]
+
+def _multiply_pairs(matrices: np.ndarray) -> np.ndarray:
+    """Multiply neighbouring matrices, padding an odd count with the identity."""
+    if len(matrices) % 2:
+        matrices = np.concatenate((matrices, np.eye(4, dtype=matrices.dtype)[None]))
+    return matrices[0::2] @ matrices[1::2]
+
+def _initial_counts(plan: np.ndarray) -> list[int]:
+    """Number of ways to fill the first two positions into each state."""
+    allowed = [[plan[i] != _B, plan[i] != _A] for i in range(2)]
+    return [int(allowed[0][state >> 1] and allowed[1][state & 1]) for state in range(4)]
+
+def count_plans(input_str: str, modulus: Optional[int] = None) -> int:
+    """
+    Returns the number of valid plans, exactly as a Python integer, or modulo modulus if it is given.
+
+    Counting multiplies the 4x4 transfer matrices of all positions. Blocks of _EXACT_BLOCK positions are multiplied
+    in NumPy int64 as a batched product tree, which is exact because the counts are still small there; the block
+    products are then combined as a balanced tree of Python integers, so the big-integer work is done in a few large
+    multiplications rather than one addition per position. With a modulus, every product is reduced, and moduli up to
+    2**30 (such as the prime 10**9 + 7) keep the whole tree in NumPy.
+    """
+    if modulus is not None and modulus < 1:
+        raise ValueError("modulus must be a positive integer")
+    plan = _as_array(input_str)
+    n = len(plan)
+    if n == 0:
+        return 1
+    if n == 1:
+        count = 2 if plan[0] == _UNKNOWN else 1
+        return count % modulus if modulus else count
+
+    matrices = _transfer_matrices(plan)
+    if modulus and modulus <= _NUMPY_MODULUS_LIMIT:
+        # residues stay small, so the whole tree can run in NumPy
+        while len(matrices) > 1:
+            matrices = _multiply_pairs(matrices) % modulus
+        blocks = matrices.tolist()
+    else:
+        size = 1
+        while size < _EXACT_BLOCK and len(matrices) > 1:
+            matrices = _multiply_pairs(matrices)
+            size *= 2
+        blocks = matrices.tolist()
+        while len(blocks) > 1:
+            if len(blocks) % 2:
+                blocks.append([[int(i == j) for j in range(4)] for i in range(4)])
+            blocks = [_multiply(blocks[i], blocks[i + 1], modulus) for i in range(0, len(blocks), 2)]
+
+    counts = _initial_counts(plan)
+    if blocks:
+        counts = [sum(counts[s] * blocks[0][s][t] for s in range(4)) for t in range(4)]
+    total = sum(counts)
+    return total % modulus if modulus else total
+
+def _multiply(left: list[list[int]], right: list[list[int]], modulus: Optional[int]) -> list[list[int]]:
+    product = [[sum(left[i][k] * right[k][j] for k in range(4)) for j in range(4)] for i in range(4)]
+    if modulus:
+        product = [[value % modulus for value in row] for row in product]
+    return product
+
+def is_feasible(input_str: str) -> bool:
+    """Whether any valid plan exists, from a boolean product tree over the transfer matrices (NumPy only)."""
+    plan = _as_array(input_str)
+    if len(plan) < 3:
+        return True # one or two letters can never form three in a row
+    matrices = _transfer_matrices(plan)
+    while len(matrices) > 1:
+        matrices = np.minimum(_multiply_pairs(matrices), 1)
+    reachable = np.array(_initial_counts(plan)) @ matrices[0]
+    return bool(reachable.any())
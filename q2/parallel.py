@@ -0,0 +1,108 @@
+"""
+Parallel filter_plan for very long plans.
+
+- safe_split_points: positions where a plan splits into independently solvable segments
+- parallel_filter_plan: solve the segments in a process pool over shared memory, with the same result as filter_plan
+
+A "?" only depends on the two resolved characters before it and the two original characters after it. Wherever two
+fixed letters sit side by side, the resolved context of the next position is those two letters whatever happened
+earlier, so the plan can be cut there and each piece solved on its own by the sequential algorithm.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+try:
+    from q2.filter_plan import fill_plan, filter_plan_fast, _DEAD_END
+except ImportError: # running as a script from inside q2/
+    from filter_plan import fill_plan, filter_plan_fast, _DEAD_END
+
+MIN_PARALLEL_LENGTH = 1_000_000
+TASKS_PER_WORKER = 4
+
+def safe_split_points(plan: np.ndarray) -> np.ndarray:
+    """
+    Returns every position p (0 < p < len(plan)) whose two preceding characters are both fixed letters.
+
+    Args:
+        - plan (numpy.ndarray) - the plan as uint8 ASCII codes.
+    """
+    fixed = plan != ord("?")
+    return np.flatnonzero(fixed[:-1] & fixed[1:]) + 2
+
+def _solve_range(shm_name: str, start: int, stop: int) -> Optional[int]:
+    """Worker task: solve plan[start:stop] in shared memory. Returns start if the greedy fill dead-ends in the segment, else None."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # the two characters before start are fixed letters, so they are all the left context needed
+        context = max(start - 2, 0)
+        work = bytearray(shm.buf[context:stop])
+        try:
+            fill_plan(work)
+        except ValueError:
+            return start
+        shm.buf[start:stop] = work[start - context:]
+        return None
+    finally:
+        shm.close()
+
+def _boundaries_valid(plan: np.ndarray, cuts: list[int]) -> bool:
+    """Check the characters around every cut: no "?" left and no three equal letters in a row across it."""
+    for cut in cuts:
+        window = plan[max(cut - 2, 0):cut + 2].tobytes()
+        if b"?" in window or b"aaa" in window or b"bbb" in window:
+            return False
+    return True
+
+def parallel_filter_plan(input_str: str, workers: Optional[int] = None, min_length: int = MIN_PARALLEL_LENGTH) -> str:
+    """
+    Returns the same plan as filter_plan, solving independent segments of long plans in parallel.
+
+    Args:
+        - input_str (str) - the plan, containing only "a", "b" and "?".
+        - workers (int) - number of worker processes (default: number of CPUs).
+        - min_length (int) - shorter plans are solved sequentially, where process start-up would cost more than it saves.
+
+    The plan is copied once into shared memory and cut at safe split points near evenly spaced targets, giving about
+    TASKS_PER_WORKER contiguous ranges per worker. Workers solve their ranges in place. The characters around each cut
+    are verified after stitching. Plans without safe split points, and plans that fail verification, are solved
+    sequentially. Raises a ValueError where the greedy fill dead-ends, as filter_plan_fast does.
+    """
+    plan = np.frombuffer(input_str.encode("ascii"), dtype=np.uint8)
+    tasks = (workers or os.cpu_count() or 1) * TASKS_PER_WORKER
+    if len(plan) < min_length or tasks <= TASKS_PER_WORKER:
+        return filter_plan_fast(input_str)
+
+    splits = safe_split_points(plan)
+    targets = np.arange(1, tasks) * (len(plan) // tasks)
+    cuts = np.unique(splits[np.minimum(np.searchsorted(splits, targets), len(splits) - 1)]) if len(splits) else splits
+    cuts = cuts[cuts < len(plan)].tolist()
+    if not cuts:
+        return filter_plan_fast(input_str)
+
+    shm = shared_memory.SharedMemory(create=True, size=len(plan))
+    try:
+        result = _solve_shared(shm, plan, cuts, workers)
+    finally:
+        shm.close()
+        shm.unlink()
+    return result if result is not None else filter_plan_fast(input_str)
+
+def _solve_shared(shm: shared_memory.SharedMemory, plan: np.ndarray, cuts: list[int], workers: Optional[int]) -> Optional[str]:
+    """Solve the segments between cuts in shm, returning the stitched plan or None if verification fails."""
+    shared = np.ndarray(len(plan), dtype=np.uint8, buffer=shm.buf)
+    shared[:] = plan
+    bounds = [0] + cuts + [len(plan)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        failures = [start for start in pool.map(_solve_range, [shm.name] * (len(bounds) - 1), bounds[:-1], bounds[1:])
+                    if start is not None]
+    valid = not failures and _boundaries_valid(shared, cuts)
+    result = shared.tobytes().decode("ascii") if valid else None
+    del shared # the shared block cannot be closed while a view of it exists
+    if failures:
+        raise ValueError(f"No valid filter in the segment starting at position {min(failures)}: {_DEAD_END}")
+    return result
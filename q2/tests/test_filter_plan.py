@@ -1,6 +1,12 @@
+import io
+
+import numpy as np
 import pytest
 
-from q2.filter_plan import filter_plan
+import q2.filter_plan
+from q2.filter_plan import filter_plan, filter_plan_fast, fill_plan, stream_filter_plan
+from q2.optimal import is_feasible
+from q2.verify import all_plans
 
 # The algorithm currently picks a" first when both "a" and "b" are valid; tests allow any result belonging to a complete set of all valid solutions.
 
@@ -91,4 +97,61 @@ def test_multiple_question_marks():
 def test_only_question_marks_contains_no_triples():
     string = "???????????????????????????????????????????????????????????????"
     result = filter_plan(string)
-    assert "aaa" not in result and "bbb" not in result
\ No newline at end of file
+    assert "aaa" not in result and "bbb" not in result
+# FAST PATH
+
+@pytest.mark.parametrize("max_run, max_length", [(64, 8), (3, 9)])
+def test_fast_path_matches_reference_on_every_short_plan(monkeypatch, max_run, max_length):
+    monkeypatch.setattr(q2.filter_plan, "_MAX_RUN", max_run) # a small block size sends runs of 4+ down the long-run path
+    for string in all_plans(max_length):
+        try:
+            expected = filter_plan(string)
+        except IndexError: # the greedy reference dead-ends on some inputs, e.g. "?a?bb"
+            with pytest.raises(ValueError, match="greedy fill dead-ends"):
+                filter_plan_fast(string)
+            continue
+        assert filter_plan_fast(string) == expected, f"Mismatch for {string}"
+
+def test_dead_end_error_does_not_claim_the_plan_is_unsolvable():
+    assert is_feasible("a??bb") # "ababb"
+    with pytest.raises(ValueError, match="may still have a solution"):
+        filter_plan_fast("a??bb")
+
+@pytest.mark.parametrize("string", ["?" * 1000, "bb" + "?" * 300 + "ab" + "?" * 65 + "a", "a?" * 500, "?ab" * 400])
+def test_fast_path_matches_reference_on_long_runs(string):
+    assert filter_plan_fast(string) == filter_plan(string)
+
+def test_fill_plan_works_in_place_on_numpy_buffer():
+    string = "a?b?a?b??ba"
+    buffer = np.frombuffer(string.encode(), dtype=np.uint8).copy()
+    fill_plan(buffer)
+    assert buffer.tobytes().decode() == filter_plan(string)
+
+def test_fast_path_without_question_marks_returns_same():
+    assert filter_plan_fast("abba") == "abba"
+
+# STREAMING
+
+def stream(string, chunk_size):
+    sink = io.BytesIO()
+    written = stream_filter_plan(io.BytesIO(string.encode()), sink, chunk_size)
+    assert written == len(sink.getvalue())
+    return sink.getvalue().decode()
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7])
+def test_streaming_matches_in_memory_on_every_short_plan(chunk_size):
+    for string in all_plans(6):
+        try:
+            expected = filter_plan_fast(string)
+        except ValueError:
+            with pytest.raises(ValueError, match="greedy fill dead-ends"):
+                stream(string, chunk_size)
+            continue
+        assert stream(string, chunk_size) == expected, f"Mismatch for {string} with chunk_size={chunk_size}"
+
+def test_streaming_ignores_line_breaks():
+    assert stream("ab?\n?b?\n", 3) == filter_plan_fast("ab??b?")
+
+def test_streaming_long_plan_across_many_chunks():
+    string = "a?b??ab???" * 1000
+    assert stream(string, 97) == filter_plan_fast(string)
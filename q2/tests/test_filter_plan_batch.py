@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from q2.batch import iter_batch_results, run_batch, solve_batch
+from q2.filter_plan import filter_plan
+
+def test_batch_matches_filter_plan_per_line():
+    plans = [b"aa?", b"a?a", b"?aa", b"??abb", b"a?b?a?b", b"?" * 70, b"?"]
+    results = solve_batch(plans)
+    assert [solution.decode() for solution, _ in results] == [filter_plan(plan.decode()) for plan in plans]
+    assert all(error is None for _, error in results)
+
+def test_errors_are_reported_per_line():
+    results = solve_batch([b"a?b", b"", b"abc", b"?a?bb", b"b?a"])
+    assert [solution for solution, _ in results] == [b"aab", None, None, None, b"baa"]
+    errors = [error for _, error in results]
+    assert errors[1] == "Empty plan"
+    assert "Invalid character 'c'" in errors[2]
+    assert "greedy fill dead-ends" in errors[3]
+
+@pytest.mark.parametrize("workers,chunk_lines", [(None, 2), (2, 3)])
+def test_results_keep_input_order(workers, chunk_lines):
+    lines = [b"a?\n", b"?a\n", b"??abb\n", b"x\n", b"ab?\n"] * 5
+    results = list(iter_batch_results(lines, workers=workers, chunk_lines=chunk_lines))
+    assert results == solve_batch([line.strip() for line in lines])
+
+def test_run_batch_writes_one_line_per_plan():
+    sink = io.BytesIO()
+    report = io.StringIO()
+    plans, errors, seconds = run_batch(io.BytesIO(b"a?a\nabc\n?aa\n"), sink, report)
+    assert sink.getvalue() == b"aba\n\nbaa\n"
+    assert report.getvalue() == "line 2: Invalid character 'c': plans may only contain 'a', 'b' and '?'\n"
+    assert (plans, errors) == (3, 1)
+    assert seconds >= 0
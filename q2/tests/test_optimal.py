@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import q2.optimal
+from q2.filter_plan import filter_plan
+from q2.optimal import count_plans, is_feasible, min_cost_plan
+from q2.verify import all_plans, brute_force_solutions
+
+def test_counts_and_feasibility_match_brute_force():
+    for string in all_plans(7):
+        solutions = brute_force_solutions(string)
+        assert count_plans(string) == len(solutions), f"Mismatch for {string}"
+        assert count_plans(string, modulus=5) == len(solutions) % 5
+        assert is_feasible(string) == bool(solutions)
+
+def test_equal_costs_give_the_first_plan_and_agree_with_greedy():
+    for string in all_plans(7):
+        solutions = brute_force_solutions(string)
+        if not solutions:
+            with pytest.raises(ValueError, match="no solution"):
+                min_cost_plan(string)
+            continue
+        plan, cost = min_cost_plan(string)
+        assert plan == min(solutions) and cost == 0
+        try:
+            assert filter_plan(string) == plan
+        except IndexError: # the greedy dead-ends, but a solution exists
+            pass
+
+def test_solves_plans_the_greedy_dead_ends_on():
+    with pytest.raises(IndexError):
+        filter_plan("?a?bb")
+    assert min_cost_plan("?a?bb") == ("baabb", 0.0)
+    assert count_plans("?a?bb") == 1
+
+def test_cheaper_letter_is_preferred():
+    assert min_cost_plan("??????", {"a": 2, "b": 1}) == ("abbabb", 8.0)
+    assert min_cost_plan("??????", {"a": 1, "b": 2}) == ("aabaab", 8.0)
+
+@pytest.mark.parametrize("cost_block", [65_536, 3])
+def test_position_costs_are_minimised(monkeypatch, cost_block):
+    monkeypatch.setattr(q2.optimal, "_COST_BLOCK", cost_block) # costs are streamed into the DP in blocks
+    rng = np.random.default_rng(0)
+    for string in ["??????", "a??b???a", "?b??a??"]:
+        costs = rng.random((len(string), 2))
+        letter_costs = {"a": 0.25, "b": 0.5}
+        total = lambda plan: sum(costs[i, int(char == "b")] + letter_costs[char] for i, char in enumerate(plan))
+        plan, cost = min_cost_plan(string, letter_costs, costs)
+        assert cost == pytest.approx(total(plan))
+        assert cost == pytest.approx(min(total(solution) for solution in brute_force_solutions(string)))
+
+def test_infinite_position_cost_forbids_a_letter():
+    costs = [[0, 0], [np.inf, 0], [0, 0]]
+    assert min_cost_plan("???", position_costs=costs) == ("aba", 0.0)
+    with pytest.raises(ValueError, match="no solution"):
+        min_cost_plan("a?a", position_costs=[[0, 0], [0, np.inf], [0, 0]])
+
+def test_position_costs_shape_is_checked():
+    with pytest.raises(ValueError, match="shape"):
+        min_cost_plan("???", position_costs=[[0, 0]])
+
+def test_exact_count_of_long_plan():
+    # with no fixed letters, valid plans are runs of length 1 or 2: a Fibonacci count, doubled for the first letter
+    fibonacci = [1, 1]
+    while len(fibonacci) <= 5000:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+    assert count_plans("?" * 5000) == 2 * fibonacci[5000]
+    assert count_plans("?" * 5000, modulus=1_000_000_007) == 2 * fibonacci[5000] % 1_000_000_007
+    assert count_plans("?" * 5000, modulus=(1 << 61) - 1) == 2 * fibonacci[5000] % ((1 << 61) - 1)
+
+def test_infeasible_long_plan():
+    string = "?" * 1000 + "aa?bb" + "?" * 1000
+    assert not is_feasible(string)
+    assert count_plans(string) == 0
+    with pytest.raises(ValueError, match="no solution"):
+        min_cost_plan(string)
+
+def test_invalid_characters_raise():
+    with pytest.raises(ValueError, match="Invalid character 'c'"):
+        count_plans("a?c")
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from q2.filter_plan import filter_plan_fast
+from q2.parallel import parallel_filter_plan, safe_split_points
+
+def random_plan(size, seed):
+    rng = np.random.default_rng(seed)
+    plan = "".join(rng.choice(["a", "b", "?"], size=size, p=[0.3, 0.3, 0.4]))
+    # avoid fixed equal pairs, which the greedy algorithm can dead-end on
+    return plan.replace("aa", "a?").replace("bb", "b?")
+
+def test_safe_split_points_follow_two_fixed_letters():
+    plan = np.frombuffer(b"ab?ba??ab", dtype=np.uint8)
+    assert safe_split_points(plan).tolist() == [2, 5, 9]
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_parallel_matches_sequential(seed):
+    plan = random_plan(20_000, seed)
+    assert parallel_filter_plan(plan, workers=2, min_length=1) == filter_plan_fast(plan)
+
+def test_plan_without_safe_splits_falls_back_to_sequential():
+    plan = "?" * 1000
+    assert parallel_filter_plan(plan, workers=2, min_length=1) == filter_plan_fast(plan)
+
+def test_short_plans_are_solved_sequentially():
+    assert parallel_filter_plan("a?b", workers=2) == "aab"
+
+def test_unsolvable_segment_raises():
+    plan = "ab" * 10 + "?a?bb" + "ab?" * 10
+    with pytest.raises(ValueError, match="greedy fill dead-ends"):
+        parallel_filter_plan(plan, workers=2, min_length=1)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from q2.filter_plan import filter_plan_fast
+from q2.verify import all_plans, brute_force_solutions, find_violation, is_valid_solution
+
+@pytest.mark.parametrize("plan, solution", [("a?b", "aab"), ("???", "aba"), ("?", "b"), ("", "")])
+def test_valid_solutions_pass(plan, solution):
+    assert find_violation(plan, solution) is None
+    assert is_valid_solution(plan, solution)
+
+@pytest.mark.parametrize("plan, solution, message", [
+    ("???", "aaa", "Three 'a' in a row from position 0"),
+    ("a??b", "abbb", "Three 'b' in a row from position 1"),
+    ("a?b", "bab", "Fixed letter 'a' at position 0 changed to 'b'"),
+    ("??", "a?", "Invalid character '?' at position 1"),
+    ("?", "ab", "Shape mismatch"),
+])
+def test_violations_are_described(plan, solution, message):
+    assert message in find_violation(plan, solution)
+    assert not is_valid_solution(plan, solution)
+
+def test_rows_are_checked_independently():
+    plans = np.frombuffer(b"??????" b"???a??", dtype=np.uint8).reshape(2, 6)
+    solutions = np.frombuffer(b"aabaab" b"bbaabb", dtype=np.uint8).reshape(2, 6)
+    assert find_violation(plans, solutions) is None # "aab" + "bba" would be three b's if the rows ran together
+    solutions = np.frombuffer(b"aabaab" b"bbbaab", dtype=np.uint8).reshape(2, 6)
+    assert find_violation(plans, solutions) == "Three 'b' in a row from row 1, position 0"
+
+def test_long_solution_is_verified():
+    plan = "?" * 2_000_000
+    solution = bytearray(filter_plan_fast(plan).encode("ascii"))
+    assert is_valid_solution(plan, solution)
+    solution[1_234_567:1_234_570] = b"bbb"
+    assert "position 1234567" in find_violation(plan, solution)
+
+def test_oracle_agrees_with_find_violation():
+    for plan in all_plans(6):
+        solutions = brute_force_solutions(plan)
+        assert solutions == sorted(solutions)
+        assert all(is_valid_solution(plan, solution) for solution in solutions)
+    assert brute_force_solutions("a?a?") == ["abaa", "abab"]
+    assert brute_force_solutions("aa?bb") == []
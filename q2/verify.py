@@ -0,0 +1,88 @@
+"""
+Vectorized checks that a solution is valid for its plan.
+
+- find_violation: describe the first rule a solution breaks, or return None if it is valid
+- is_valid_solution: whether a solution is valid
+- all_plans / brute_force_solutions: every plan up to a length, and every valid filling of a short plan, the
+  exhaustive oracle the solvers are tested against
+
+A solution is valid if it has the plan's length, contains only "a" and "b", keeps every fixed letter of the plan and
+has no letter three times in a row. Every rule is a whole-array comparison (three shifted views for the sliding
+window), so a multi-million-character solution is checked in milliseconds with no Python loop per character.
+Both functions also take 2-D uint8 arrays of equal-length plans and solutions, one per row.
+"""
+
+import itertools
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+_A, _B, _UNKNOWN = ord("a"), ord("b"), ord("?")
+
+PlanLike = Union[str, bytes, bytearray, np.ndarray]
+
+def _as_codes(plan: PlanLike) -> np.ndarray:
+    if isinstance(plan, np.ndarray):
+        return plan
+    if isinstance(plan, str):
+        plan = plan.encode("ascii")
+    return np.frombuffer(plan, dtype=np.uint8)
+
+def _location(shape: tuple, flat_index: int) -> str:
+    if len(shape) == 1:
+        return f"position {flat_index}"
+    row, column = np.unravel_index(flat_index, shape)
+    return f"row {row}, position {column}"
+
+def find_violation(plan: PlanLike, solution: PlanLike) -> Optional[str]:
+    """
+    Returns a description of the first rule solution breaks for plan, or None if solution is valid.
+
+    Args:
+        - plan (str, bytes or numpy.ndarray) - the plan, containing "a", "b" and "?".
+        - solution (str, bytes or numpy.ndarray) - the filled plan to check.
+    """
+    plan, solution = _as_codes(plan), _as_codes(solution)
+    if plan.shape != solution.shape:
+        return f"Shape mismatch: plan is {plan.shape}, solution is {solution.shape}"
+
+    unresolved = (solution != _A) & (solution != _B)
+    if unresolved.any():
+        index = int(unresolved.argmax())
+        return f"Invalid character {chr(solution.flat[index])!r} at {_location(solution.shape, index)}"
+
+    changed = (plan != _UNKNOWN) & (plan != solution)
+    if changed.any():
+        index = int(changed.argmax())
+        return (f"Fixed letter {chr(plan.flat[index])!r} at {_location(plan.shape, index)} "
+                f"changed to {chr(solution.flat[index])!r}")
+
+    triples = (solution[..., :-2] == solution[..., 1:-1]) & (solution[..., 1:-1] == solution[..., 2:])
+    if triples.any():
+        index = int(triples.argmax())
+        start = np.unravel_index(index, triples.shape)
+        flat_start = int(np.ravel_multi_index(start, solution.shape))
+        return f"Three {chr(solution.flat[flat_start])!r} in a row from {_location(solution.shape, flat_start)}"
+    return None
+
+def is_valid_solution(plan: PlanLike, solution: PlanLike) -> bool:
+    """Whether solution is a valid filling of plan (see find_violation)."""
+    return find_violation(plan, solution) is None
+
+# ORACLE
+
+def all_plans(max_length: int) -> Iterator[str]:
+    """Every plan of "a", "b" and "?" from length 1 to max_length."""
+    for length in range(1, max_length + 1):
+        for chars in itertools.product("ab?", repeat=length):
+            yield "".join(chars)
+
+def brute_force_solutions(plan: str) -> list[str]:
+    """Every valid filling of plan, in alphabetical order, by trying all 2 ** plan.count("?") fillings."""
+    solutions = []
+    for fill in itertools.product("ab", repeat=plan.count("?")):
+        letters = iter(fill)
+        solution = "".join(next(letters) if char == "?" else char for char in plan)
+        if "aaa" not in solution and "bbb" not in solution:
+            solutions.append(solution)
+    return solutions